@@ -0,0 +1,272 @@
+# Anomaly scan over the meter history of many homes.
+#
+# Homes are processed in chunks. Each chunk's history is loaded into dense
+# (homes x days x 96) arrays on a common date axis, and every detector works on
+# whole arrays with rolling windows along the day axis:
+#   overnight_flow  water flowing in every night slot (00:00-05:00) for N nights in a row (leaks)
+#   activity_drop   active_score falling well below its mean over the previous days
+#   norm_deviation  slots with water use staying far from what four_week_usage_norm expects for several days
+# Chunks run in a process pool, each worker opening its own connection (or snapshot).
+#
+# Usage: python anomaly_scan.py --since YYYY-MM-DD [--until YYYY-MM-DD] [--homes H1,H2]
+#                               [--workers 4] [--output anomalies.csv|.parquet]
+
+import argparse
+import logging
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from range_view import SLOTS_PER_DAY, SLOTS_PER_HOUR, to_slot_row
+
+logger = logging.getLogger(__name__)
+
+ARRAY_FIELDS = ['usage', 'four_week_usage_norm', 'water_consumption']
+SCAN_PROJECTION = {'_id': 0, 'home_id': 1, 'date': 1, 'active_score': 1, **{field: 1 for field in ARRAY_FIELDS}}
+
+# Slots counted as night for overnight_flow (00:00-05:00)
+NIGHT_SLOTS = slice(0, 5 * SLOTS_PER_HOUR)
+
+EVENT_COLUMNS = ['home_id', 'date', 'kind', 'value', 'baseline']
+
+# four_week_usage_norm is a percentage (plotted on 0-100 in the dashboard): how often the
+# slot had water use over the last four weeks
+NORM_PERCENT = 100.0
+
+
+def date_axis(start_date_str, end_date_str):
+    start = datetime.strptime(start_date_str, '%Y-%m-%d')
+    days = (datetime.strptime(end_date_str, '%Y-%m-%d') - start).days + 1
+    return [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(max(days, 0))]
+
+
+def _empty_history(home_ids, dates):
+    history = {'home_ids': list(home_ids), 'dates': list(dates)}
+    for field in ARRAY_FIELDS:
+        history[field] = np.full((len(home_ids), len(dates), SLOTS_PER_DAY), np.nan, dtype=np.float32)
+    history['active_score'] = np.full((len(home_ids), len(dates)), np.nan)
+    return history
+
+
+# History of home_ids over dates from a Mongo collection, one query per chunk
+def load_from_collection(collection, home_ids, dates, batch_size=1000):
+    history = _empty_history(home_ids, dates)
+    home_index = {home_id: i for i, home_id in enumerate(home_ids)}
+    date_index = {date_str: j for j, date_str in enumerate(dates)}
+    cursor = collection.find(
+        {'home_id': {'$in': list(home_ids)}, 'date': {'$gte': dates[0], '$lte': dates[-1]}},
+        SCAN_PROJECTION
+    ).batch_size(batch_size)
+    for document in cursor:
+        i, j = home_index[document['home_id']], date_index[document['date']]
+        for field in ARRAY_FIELDS:
+            history[field][i, j] = to_slot_row(document.get(field))
+        score = document.get('active_score')
+        history['active_score'][i, j] = np.nan if score is None else score
+    return history
+
+
+# History of home_ids over dates from a snapshot, one vectorized row lookup per day
+def load_from_snapshot(backend, home_ids, dates):
+    history = _empty_history(home_ids, dates)
+    for j, date_str in enumerate(dates):
+        rows = backend.get_rows(date_str, home_ids, ARRAY_FIELDS + ['active_score'])
+        for field in ARRAY_FIELDS:
+            history[field][:, j] = rows[field]
+        history['active_score'][:, j] = rows['active_score']
+    return history
+
+
+# Trailing window sums along the last axis (NaN counts as 0) and the number of values in each window
+def rolling_sum(values, window):
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=-1)
+    counts = np.cumsum(valid, axis=-1)
+    sums[..., window:] = sums[..., window:] - sums[..., :-window]
+    counts[..., window:] = counts[..., window:] - counts[..., :-window]
+    return sums, counts
+
+
+def rolling_mean(values, window, min_periods=1):
+    sums, counts = rolling_sum(values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts >= min_periods, sums / counts, np.nan)
+
+
+# True where mask held on each of the last `window` days
+def consecutive(mask, window):
+    sums, _ = rolling_sum(mask.astype(float), window)
+    return sums >= window
+
+
+def _nan_reduce(function, values, axis):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return function(values, axis=axis)
+
+
+# Water flowing in every night slot for `nights` nights in a row
+def detect_overnight_flow(history, min_flow=0.0, nights=3):
+    night = history['water_consumption'][:, :, NIGHT_SLOTS]
+    night_min = _nan_reduce(np.nanmin, night, axis=2)
+    complete = ~np.isnan(night).any(axis=2)
+    flowing = complete & (night_min > min_flow)
+    return consecutive(flowing, nights), night_min, np.full(night_min.shape, min_flow)
+
+
+# active_score below (1 - drop_ratio) x its mean over the previous `window` days
+def detect_activity_drop(history, window=14, drop_ratio=0.5, min_periods=7):
+    score = history['active_score']
+    mean = rolling_mean(score, window, min_periods)
+    # Baseline for day d is the window ending on d - 1
+    baseline = np.full(score.shape, np.nan)
+    baseline[:, 1:] = mean[:, :-1]
+    with np.errstate(invalid='ignore'):
+        flagged = (baseline > 0) & (score < baseline * (1 - drop_ratio))
+    return flagged, score, baseline
+
+
+# Relative gap between the slots with water use and the number the four-week norm expects
+# (sum of norm / 100 over the reported slots), averaged over `days` days, above threshold
+def detect_norm_deviation(history, threshold=0.5, days=3):
+    reported = ~np.isnan(history['usage'])
+    with np.errstate(invalid='ignore'):
+        active = np.sum(reported & (history['usage'] > 0), axis=2)
+    norm = np.where(reported, history['four_week_usage_norm'], np.nan)
+    expected = _nan_reduce(np.nansum, norm, axis=2) / NORM_PERCENT
+    missing = ~reported.any(axis=2) | (expected <= 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        deviation = np.where(missing, np.nan, np.abs(active - expected) / expected)
+    mean = rolling_mean(deviation, days, min_periods=days)
+    with np.errstate(invalid='ignore'):
+        flagged = mean > threshold
+    return flagged, mean, np.full(mean.shape, threshold)
+
+
+DETECTORS = {
+    'overnight_flow': detect_overnight_flow,
+    'activity_drop': detect_activity_drop,
+    'norm_deviation': detect_norm_deviation,
+}
+
+
+# Run the detectors on one history and return the flagged (home, date) events
+def find_anomalies(history, detectors=None, options=None):
+    options = options or {}
+    home_ids = np.asarray(history['home_ids'], dtype=object)
+    dates = np.asarray(history['dates'], dtype=object)
+    frames = []
+    for kind in detectors or DETECTORS:
+        flagged, value, baseline = DETECTORS[kind](history, **options.get(kind, {}))
+        homes, days = np.nonzero(flagged)
+        frames.append(pd.DataFrame({
+            'home_id': home_ids[homes],
+            'date': dates[days],
+            'kind': kind,
+            'value': value[homes, days],
+            'baseline': baseline[homes, days],
+        }))
+    if not frames:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+# Data source of the current process; set per worker by _init_worker
+_source = None
+
+
+def open_source(source):
+    if source[0] == 'snapshot':
+        from snapshot_store import SnapshotBackend
+        return SnapshotBackend(source[1])
+    from db import create_client
+    _, uri, database, collection = source
+    return create_client(uri)[database][collection]
+
+
+def list_homes(source):
+    if source[0] == 'snapshot':
+        return open_source(source).distinct_homes()
+    return open_source(source).distinct('home_id')
+
+
+def _init_worker(source):
+    global _source
+    _source = open_source(source)
+
+
+def scan_chunk(home_ids, dates, source_kind, detectors=None, options=None):
+    if source_kind == 'snapshot':
+        history = load_from_snapshot(_source, home_ids, dates)
+    else:
+        history = load_from_collection(_source, home_ids, dates)
+    return find_anomalies(history, detectors, options)
+
+
+# Scan home_ids over start..end. source is ('mongo', uri, database, collection) or ('snapshot', root).
+# workers=1 runs in this process.
+def scan(home_ids, start_date_str, end_date_str, source, workers=None, chunk_size=100, detectors=None, options=None):
+    global _source
+    dates = date_axis(start_date_str, end_date_str)
+    home_ids = list(home_ids)
+    chunks = [home_ids[i:i + chunk_size] for i in range(0, len(home_ids), chunk_size)]
+    if not chunks or not dates:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _source = open_source(source)
+        frames = [scan_chunk(chunk, dates, source[0], detectors, options) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(source,)) as executor:
+            futures = [
+                executor.submit(scan_chunk, chunk, dates, source[0], detectors, options) for chunk in chunks
+            ]
+            frames = [future.result() for future in futures]
+    return pd.concat(frames, ignore_index=True).sort_values(['home_id', 'date', 'kind'], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan the meter history for anomalies")
+    parser.add_argument('--since', required=True, help='first date to scan (YYYY-MM-DD)')
+    parser.add_argument('--until', help='last date to scan (default: yesterday)')
+    parser.add_argument('--homes', help='comma-separated Home IDs (default: all)')
+    parser.add_argument('--detectors', help=f"comma-separated subset of {', '.join(DETECTORS)}")
+    parser.add_argument('--workers', type=int, help='processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=100, help='homes per task')
+    parser.add_argument('--output', help='write events to a .csv or .parquet file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    load_dotenv('variables.env')
+    if os.getenv('DATA_BACKEND', 'mongo') == 'snapshot':
+        source = ('snapshot', os.getenv('SNAPSHOT_PATH', 'snapshot'))
+    else:
+        source = (
+            'mongo', os.getenv('MONGODB_URI'),
+            os.getenv('MONGODB_DATABASE', os.getenv('MONGODB_DB')), os.getenv('MONGODB_COLLECTION')
+        )
+    until = args.until or (datetime.today() - timedelta(days=1)).strftime('%Y-%m-%d')
+    home_ids = args.homes.split(',') if args.homes else list_homes(source)
+    detectors = args.detectors.split(',') if args.detectors else None
+
+    start = time.perf_counter()
+    events = scan(home_ids, args.since, until, source, args.workers, args.chunk_size, detectors)
+    logger.info("Scanned %s homes from %s to %s in %.1fs", len(home_ids), args.since, until, time.perf_counter() - start)
+    for kind, count in events['kind'].value_counts().items():
+        logger.info("%s: %s events in %s homes", kind, count, events.loc[events['kind'] == kind, 'home_id'].nunique())
+    if args.output:
+        if args.output.endswith('.parquet'):
+            events.to_parquet(args.output, index=False)
+        else:
+            events.to_csv(args.output, index=False)
+        logger.info("Events written to %s", args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,304 +8,737 @@ load_dotenv('variables.env')
 
 # MongoDB Connection URI and Database Name from .env file
 MONGODB_URI = os.getenv("MONGODB_URI")
-MONGODB_DATABASE = os.getenv("MONGODB_DATABASE")
+MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", os.getenv("MONGODB_DB"))
 MONGODB_COLLECTION = os.getenv("MONGODB_COLLECTION")
 
-from pymongo import MongoClient
+# Precomputed per-home daily status table (see materialize_status.py), read by the fleet overview
+MONGODB_STATUS_COLLECTION = os.getenv("MONGODB_STATUS_COLLECTION", "DailyHomeStatus")
+
+# Index bootstrap at startup: 'check' warns if missing, 'create' builds it, 'off' skips
+MONGODB_ENSURE_INDEXES = os.getenv("MONGODB_ENSURE_INDEXES", "check")
+
+# 'mongo' reads the live collection, 'snapshot' reads the local Arrow snapshot at SNAPSHOT_PATH
+DATA_BACKEND = os.getenv("DATA_BACKEND", "mongo")
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "snapshot")
+
+# Cache settings for meter documents (TTL in seconds, memory cap in MB)
+DATA_CACHE_MAX_ENTRIES = int(os.getenv("DATA_CACHE_MAX_ENTRIES", "2048"))
+DATA_CACHE_TTL = int(os.getenv("DATA_CACHE_TTL", "300"))
+DATA_CACHE_MAX_MB = int(os.getenv("DATA_CACHE_MAX_MB", "64"))
+
+# 'memory' keeps the caches in each process, 'disk' shares them between processes
+# (e.g. gunicorn workers) through a diskcache directory at DATA_CACHE_DIR
+DATA_CACHE_BACKEND = os.getenv("DATA_CACHE_BACKEND", "memory")
+DATA_CACHE_DIR = os.getenv("DATA_CACHE_DIR", "cache")
+
+# Background callbacks (range view, fleet overview) run as jobs stored in BACKGROUND_CACHE_DIR;
+# identical requests share a job and its result is kept for BACKGROUND_RESULT_TTL seconds
+BACKGROUND_CACHE_DIR = os.getenv("BACKGROUND_CACHE_DIR", "cache/background")
+BACKGROUND_RESULT_TTL = int(os.getenv("BACKGROUND_RESULT_TTL", "60"))
+
+# /export: concurrent downloads per process, documents per streamed chunk, homes per request
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "200"))
+EXPORT_MAX_HOMES = int(os.getenv("EXPORT_MAX_HOMES", "500"))
+
+# Live mode for today's readings: 'auto' uses a change stream when the server supports it and
+# polls every LIVE_POLL_INTERVAL seconds otherwise ('change_stream', 'poll' force one, 'off' disables).
+# Browsers ask for new slots every LIVE_REFRESH_MS; watchers unread for LIVE_IDLE_TIMEOUT seconds are dropped.
+LIVE_MODE = os.getenv("LIVE_MODE", "auto")
+LIVE_POLL_INTERVAL = int(os.getenv("LIVE_POLL_INTERVAL", "30"))
+LIVE_REFRESH_MS = int(os.getenv("LIVE_REFRESH_MS", "30000"))
+LIVE_IDLE_TIMEOUT = int(os.getenv("LIVE_IDLE_TIMEOUT", "120"))
+
+# Set by wsgi.py: background threads start in each worker after fork, not at import
+DEFER_BACKGROUND_TASKS = os.getenv("DEFER_BACKGROUND_TASKS", "0") == "1"
+
+# /ready: seconds a readiness check result is reused, and the longest a probe waits for a check
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "5"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "1"))
+
+# Home ID dropdown settings (refresh interval and first-load wait in seconds)
+HOME_IDS_REFRESH_INTERVAL = int(os.getenv("HOME_IDS_REFRESH_INTERVAL", "600"))
+HOME_IDS_READY_TIMEOUT = float(os.getenv("HOME_IDS_READY_TIMEOUT", "5"))
+HOME_IDS_SEARCH_LIMIT = int(os.getenv("HOME_IDS_SEARCH_LIMIT", "50"))
+
+# Prefetch settings (days either side of the viewed day, 0 disables; queued days kept at most)
+PREFETCH_WINDOW = int(os.getenv("PREFETCH_WINDOW", "1"))
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "32"))
+
+# Callbacks slower than this (ms) are logged with their (date, home_id); 0 disables
+SLOW_CALLBACK_MS = int(os.getenv("SLOW_CALLBACK_MS", "1000"))
+
+# Longest date range (in days) the range view will fetch
+RANGE_MAX_DAYS = int(os.getenv("RANGE_MAX_DAYS", "366"))
+
+# Range time series: downsampling method ('lttb' or 'minmax'), points per pixel of graph
+# width (used when the width is not known yet) and the point count above which WebGL is used
+RANGE_DOWNSAMPLE = os.getenv("RANGE_DOWNSAMPLE", "lttb")
+RANGE_POINTS_PER_PIXEL = float(os.getenv("RANGE_POINTS_PER_PIXEL", "2"))
+RANGE_DEFAULT_WIDTH = int(os.getenv("RANGE_DEFAULT_WIDTH", "1000"))
+RANGE_WEBGL_MIN_POINTS = int(os.getenv("RANGE_WEBGL_MIN_POINTS", "500"))
+
+import atexit
+import shutil
+import tempfile
+import threading
 from datetime import datetime, timedelta
+from functools import lru_cache
 import dash
-from dash import dcc, html
-from dash.dependencies import Input, Output, State
-import pandas as pd
+from dash import dcc, html, dash_table, Patch, no_update
+from dash.dependencies import Input, Output, State, ClientsideFunction
 import plotly.graph_objs as go
 import dash_bootstrap_components as dbc
+from dash.exceptions import PreventUpdate
+from cache import TTLLRUCache, SharedDiskCache
+from db import create_client, ensure_day_index
+from backends import MongoBackend
+from snapshot_store import SnapshotBackend
+from classifiers import (
+    determine_activity_level, determine_regularity_level, determine_status,
+    classify_frame, STATUS_LABELS
+)
+from home_ids import HomeIdIndex
+from background_jobs import SharedJobManager
+import metrics
+import export
+import health
+from metrics import instrumented, stage
+from prefetch import Prefetcher, neighbour_dates
+from range_view import stack_documents, daily_totals, hour_of_day_profile, slot_timestamps
+from downsample import downsample
+from live import LiveHub, LIVE_FIELDS, today_str
 
-# Connect to MongoDB using environment variables
-client = MongoClient(MONGODB_URI)
+# Mongo command latencies are recorded for /metrics (must be registered before the client is created)
+metrics.install_mongo_listener()
+
+# Connect to MongoDB using environment variables (pool size, timeouts and read preference from MONGODB_*).
+# connect=False defers the connection to the first query, so a preloaded app forks before any socket exists.
+client = create_client(MONGODB_URI, connect=False)
 db = client[MONGODB_DATABASE]
 collection = db[MONGODB_COLLECTION]
+status_collection = db[MONGODB_STATUS_COLLECTION]
 
-# Retrieve distinct Home IDs from the collection
-home_ids = collection.distinct('home_id')
-
-# Determine the activity level based on active score and norms
-def determine_activity_level(active_score, low_norm, norm_score, high_norm):
-    if active_score <= low_norm:
-        return 'Abnormal', 'red'
-    elif low_norm < active_score <= norm_score:
-        return 'Low', 'yellow'
-    elif norm_score < active_score <= high_norm:
-        return 'Active', 'blue'
-    elif active_score > high_norm:
-        return 'High', 'green'
-    else:
-        return 'Unknown', 'gray'
-    
-# Determine the regularity level based on correlation coefficient
-def determine_regularity_level(corr_coef):
-    if corr_coef < 0.30:
-        return 'Abnormal', 'red'
-    elif 0.30 <= corr_coef < 0.50:
-        return 'Low', 'yellow'
-    elif 0.50 <= corr_coef < 0.70:
-        return 'Normal', 'blue'
-    elif corr_coef >= 0.70:
-        return 'High', 'green'
-    else:
-        return 'Unknown', 'gray'
-
-# Determine the overall status based on the lowest level of activity and regularity
-def determine_status(activity_level, regularity_level):
-    levels = {'Abnormal': 1, 'Low': 2, 'Normal': 3, 'Active': 4, 'High': 5}
-    lowest_level = min(levels[activity_level], levels[regularity_level])
-
-    if lowest_level == 1:
-        return 'Attention', 'red'
-    elif lowest_level == 2:
-        return 'Normal', 'yellow'
-    elif lowest_level == 3:
-        return 'Normal', 'blue'
-    elif lowest_level == 4:
-        return 'Active', 'blue'
-    elif lowest_level == 5:
-        return 'High', 'green'
+# Backend serving all reads (see backends.py)
+if DATA_BACKEND == 'snapshot':
+    backend = SnapshotBackend(SNAPSHOT_PATH)
+else:
+    backend = MongoBackend(collection)
+
+# Distinct Home IDs are loaded and refreshed in the background, not at import
+home_ids = HomeIdIndex(
+    backend.distinct_homes,
+    refresh_interval=HOME_IDS_REFRESH_INTERVAL
+)
+
+# One watcher per home viewed live, shared by every session (see live.py)
+live_hub = LiveHub(
+    collection,
+    mode=LIVE_MODE,
+    poll_interval=LIVE_POLL_INTERVAL,
+    idle_timeout=LIVE_IDLE_TIMEOUT
+)
+
+background_tasks_started = False
+background_tasks_lock = threading.Lock()
+
+# Start the Home ID refresh and the index check; threads do not survive fork,
+# so under a preloading WSGI server this runs in each worker (see gunicorn.conf.py)
+def start_background_tasks():
+    global background_tasks_started
+    with background_tasks_lock:
+        if background_tasks_started:
+            return
+        background_tasks_started = True
+
+    home_ids.start()
+
+    if DATA_BACKEND == 'mongo' and LIVE_MODE != 'off':
+        live_hub.start()
+
+    # Check (or create) the (home_id, date) index without blocking startup
+    if DATA_BACKEND == 'mongo' and MONGODB_ENSURE_INDEXES != 'off':
+        threading.Thread(
+            target=ensure_day_index,
+            args=(collection,),
+            kwargs={'create': MONGODB_ENSURE_INDEXES == 'create'},
+            name='ensure-day-index',
+            daemon=True
+        ).start()
+
+# Fallback for WSGI servers without a post-fork hook: start the background tasks on the
+# first request (registered as a before_request hook once the app exists)
+def ensure_background_tasks():
+    if not background_tasks_started:
+        start_background_tasks()
+
+if not DEFER_BACKGROUND_TASKS:
+    start_background_tasks()
+
+# Cache backend chosen by DATA_CACHE_BACKEND; name is a subdirectory of DATA_CACHE_DIR when shared
+def make_cache(name, max_entries):
+    if DATA_CACHE_BACKEND == 'disk':
+        return SharedDiskCache(
+            os.path.join(DATA_CACHE_DIR, name),
+            ttl=DATA_CACHE_TTL,
+            max_bytes=DATA_CACHE_MAX_MB * 1024 * 1024
+        )
+    return TTLLRUCache(max_entries=max_entries, ttl=DATA_CACHE_TTL, max_bytes=DATA_CACHE_MAX_MB * 1024 * 1024)
+
+# Read-through cache for documents keyed on (date, home_id)
+data_cache = make_cache('documents', DATA_CACHE_MAX_ENTRIES)
+
+# Daily documents are immutable once the day is over, so past dates never expire
+def cache_ttl_for_date(date_str):
+    if date_str < datetime.today().strftime('%Y-%m-%d'):
+        return None
+    return DATA_CACHE_TTL
+
+# Function to retrieve data for a given date and Home ID, served from the cache when possible
+def get_data_for_date_and_home(date_str, home_id):
+    key = (date_str, home_id)
+    data = data_cache.get(key)
+    if data is not None:
+        prefetcher.note_hit(key)
+        return data
+
+    if backend.batch_neighbours:
+        data = fetch_day_with_neighbours(date_str, home_id)
     else:
-        return 'Unknown', 'gray'
-        
+        data = fetch_data_for_date_and_home(date_str, home_id)
+    # Misses and errors are not cached so a later write or recovery is picked up
+    if data is not None:
+        data_cache.set(key, data, ttl=cache_ttl_for_date(date_str))
+    return data
+
+# Keep only the fields the dashboard uses from a meter document
+def document_to_data(data):
+    water_consumption = data['water_consumption']
+    usage = data['usage']
+    norm = data['four_week_usage_norm']
+    active_score = data['active_score']
+    corr_coef = data['correlation_coefficient']
+    low_norm = data['low_norm']
+    norm_score = data['norm_active_score']
+    high_norm = data['high_norm']
+    return {
+        'water_consumption': water_consumption,
+        'usage': usage,
+        'norm': norm,
+        'active_score': active_score,
+        'corr_coef': corr_coef,
+        'low_norm': low_norm,
+        'norm_score': norm_score,
+        'high_norm': high_norm
+    }
+
 # Function to retrieve data for a given date and Home ID from MongoDB
-def get_data_for_date_and_home(date_str, home_id):
+def fetch_data_for_date_and_home(date_str, home_id):
     # print(f"Fetching data for date: {date_str} and home_id: {home_id}")
     try:
-        data = collection.find_one({'date': date_str, 'home_id': home_id})
+        data = backend.get_day(date_str, home_id)
         if data:
-            water_consumption = data['water_consumption']
-            usage = data['usage']
-            norm = data['four_week_usage_norm']
-            active_score = data['active_score']
-            corr_coef = data['correlation_coefficient']
-            low_norm = data['low_norm']
-            norm_score = data['norm_active_score']
-            high_norm = data['high_norm']
-            return {
-                'water_consumption': water_consumption,
-                'usage': usage,
-                'norm': norm,
-                'active_score': active_score,
-                'corr_coef': corr_coef,
-                'low_norm': low_norm,
-                'norm_score': norm_score,
-                'high_norm': high_norm
-            }
+            return document_to_data(data)
         else:
             return None
     except Exception as e:
         # print(f"Error fetching data: {e}")
         return None
 
+# Fetch a day and its neighbours in one backend call; the neighbours warm the cache
+def fetch_day_with_neighbours(date_str, home_id):
+    try:
+        documents = backend.get_days([date_str] + neighbour_dates(date_str, PREFETCH_WINDOW), home_id)
+    except Exception as e:
+        # print(f"Error fetching data: {e}")
+        return None
+    for day_str, document in documents.items():
+        if document and day_str != date_str:
+            data_cache.set((day_str, home_id), document_to_data(document), ttl=cache_ttl_for_date(day_str))
+    return document_to_data(documents[date_str]) if documents[date_str] else None
+
+# Stacked ranges are filled by update_range_graphs, which runs in a background job process,
+# and read by update_range_series in the web process, so the cache is a diskcache directory
+# either way. With DATA_CACHE_BACKEND=disk it is shared under DATA_CACHE_DIR; otherwise it is
+# a temporary directory seen only by this process and the ones it forks (jobs, preloaded
+# gunicorn workers), removed when it exits.
+def make_range_cache():
+    if DATA_CACHE_BACKEND == 'disk':
+        directory = os.path.join(DATA_CACHE_DIR, 'ranges')
+    else:
+        directory = tempfile.mkdtemp(prefix='ranges-')
+        owner = os.getpid()
+        atexit.register(lambda: os.getpid() == owner and shutil.rmtree(directory, ignore_errors=True))
+    return SharedDiskCache(directory, ttl=DATA_CACHE_TTL, max_bytes=DATA_CACHE_MAX_MB * 1024 * 1024)
+
+range_cache = make_range_cache()
+
+# Data source in the range cache keys, so a shared cache never serves another backend's ranges
+RANGE_SOURCE = (
+    f'snapshot:{SNAPSHOT_PATH}' if DATA_BACKEND == 'snapshot'
+    else f'mongo:{MONGODB_DATABASE}.{MONGODB_COLLECTION}'
+)
+
+def range_cache_key(start_date_str, end_date_str, home_id):
+    return (RANGE_SOURCE, start_date_str, end_date_str, home_id)
+
+# Function to retrieve all documents for a Home ID and date range in one query
+def get_data_for_range(start_date_str, end_date_str, home_id):
+    key = range_cache_key(start_date_str, end_date_str, home_id)
+    data = range_cache.get(key)
+    if data is not None:
+        return data
+    try:
+        data = stack_documents(backend.get_range(start_date_str, end_date_str, home_id))
+        range_cache.set(key, data)
+        return data
+    except Exception as e:
+        # print(f"Error fetching range data: {e}")
+        return None
+
+# Fields needed to classify every home for one date
+FLEET_FIELDS = [
+    'home_id', 'active_score', 'correlation_coefficient',
+    'low_norm', 'norm_active_score', 'high_norm'
+]
+
+# Function to retrieve the classifier inputs of all homes for a given date
+def get_fleet_scores(date_str):
+    try:
+        return backend.get_date(date_str, FLEET_FIELDS)
+    except Exception as e:
+        # print(f"Error fetching fleet data: {e}")
+        return None
+
+# Columns the fleet overview needs from the materialized status table
+STATUS_PROJECTION = {
+    '_id': 0, 'home_id': 1, 'activity_level': 1, 'regularity_level': 1, 'status': 1,
+    'active_score': 1, 'correlation_coefficient': 1
+}
+
+# Function to read the precomputed statuses of all homes for a given date, None if not materialized
+def get_fleet_status(date_str):
+    import pandas as pd
+    if DATA_BACKEND != 'mongo':
+        return None
+    try:
+        rows = list(status_collection.find({'date': date_str}, STATUS_PROJECTION))
+        return pd.DataFrame(rows) if rows else None
+    except Exception as e:
+        # print(f"Error fetching fleet status: {e}")
+        return None
+
+# Prefetcher loading neighbouring days into data_cache after each view
+prefetcher = Prefetcher(
+    fetch_data_for_date_and_home,
+    data_cache,
+    cache_ttl_for_date,
+    window=PREFETCH_WINDOW,
+    max_workers=PREFETCH_WORKERS,
+    max_pending=PREFETCH_MAX_PENDING
+)
+
+# Badge with a rounded border and colored text, replacing the old Plotly shape figures.
+# Only label and color vary, so each combination is built once and reused.
+@lru_cache(maxsize=None)
+def make_status_badge(label, color):
+    return html.Div(
+        label,
+        style={
+            'width': '110px', 'height': '40px', 'lineHeight': '38px',
+            'border': f'1px solid {color}', 'borderRadius': '10px',
+            'color': color, 'fontSize': 16, 'textAlign': 'center'
+        }
+    )
+
+@lru_cache(maxsize=None)
+def make_circle_badge(label, color):
+    return html.Div(
+        label,
+        style={
+            'width': '40px', 'height': '40px', 'lineHeight': '38px',
+            'border': f'1px solid {color}', 'borderRadius': '50%',
+            'color': color, 'fontSize': 16, 'textAlign': 'center'
+        }
+    )
+
+# Partial update of a bar chart from app.layout: only the bar heights and title are sent
+def patch_bar_figure(y, title):
+    patch = Patch()
+    patch['data'][0]['y'] = y
+    patch['layout']['title']['text'] = title
+    return patch
+
+# Local job manager for the background callbacks, shared by all worker processes
+background_callback_manager = SharedJobManager(BACKGROUND_CACHE_DIR, result_ttl=BACKGROUND_RESULT_TTL)
+
 # Initialize the Dash app
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-
-# Define the layout of the app
-app.layout = dbc.Container(
-    fluid=True,
-    children=[
-        dbc.Row(
-            [
-                # Left section for login and date picker
-                dbc.Col(
-                    width=3,
-                    children=[
-                        dbc.Button(
-                            ">",
-                            id="toggle-button",
-                            color="primary",
-                            className="mb-3",
-                        ),
-                        dbc.Collapse(
-                            id="collapse",
-                            is_open=False,
-                            children=html.Div(
-                                className="border rounded p-3",
+app = dash.Dash(
+    __name__,
+    external_stylesheets=[dbc.themes.BOOTSTRAP],
+    background_callback_manager=background_callback_manager
+)
+app.server.before_request(ensure_background_tasks)
+
+# Per-callback timing and Prometheus metrics at /metrics
+metrics.install(app.server, slow_callback_ms=SLOW_CALLBACK_MS)
+
+# Streaming CSV/Parquet download of a home's history at /export, from the configured backend
+if DATA_BACKEND == 'snapshot':
+    export_source = export.backend_source(backend)
+else:
+    export_source = export.collection_source(collection, EXPORT_BATCH_SIZE)
+active_exports = export.install(
+    app.server, export_source,
+    max_concurrent=EXPORT_MAX_CONCURRENT,
+    batch_size=EXPORT_BATCH_SIZE,
+    max_homes=EXPORT_MAX_HOMES
+)
+metrics.register_gauge('dashboard_live', 'Live update watchers.', 'stat', live_hub.stats)
+metrics.register_gauge('dashboard_exports', 'Exports being streamed.', 'stat', lambda: {'active': active_exports()})
+metrics.register_gauge('dashboard_data_cache', 'Document cache statistics.', 'stat', data_cache.stats)
+metrics.register_gauge('dashboard_prefetch', 'Prefetcher statistics.', 'stat', prefetcher.stats)
+# Metrics of the background callbacks are recorded in their job processes and merged here
+metrics.register_collector(background_callback_manager.collect_metrics)
+metrics.register_gauge('dashboard_home_ids', 'Home IDs in the dropdown index.', 'stat', lambda: {'count': len(home_ids)})
+
+# The data source answers: a Mongo ping (the first one opens the connection) or the snapshot directory
+def database_ready():
+    if DATA_BACKEND == 'snapshot':
+        return os.path.isdir(SNAPSHOT_PATH)
+    client.admin.command('ping')
+    return True
+
+# Liveness at /health, readiness at /ready (database reachable and Home IDs loaded)
+health.install(
+    app.server,
+    {'database': database_ready, 'home_ids': lambda: home_ids.ready},
+    interval=HEALTH_CHECK_INTERVAL,
+    timeout=HEALTH_CHECK_TIMEOUT
+)
+
+# Define the layout of the app. It is served as a function so the date defaults follow the
+# current day; one build per day is reused (Dash also calls it once at startup to validate callbacks).
+@lru_cache(maxsize=1)
+def build_layout(today):
+    return dbc.Container(
+        fluid=True,
+        children=[
+            dbc.Row(
+                [
+                    # Left section for login and date picker
+                    dbc.Col(
+                        width=3,
+                        children=[
+                            dbc.Button(
+                                ">",
+                                id="toggle-button",
+                                color="primary",
+                                className="mb-3",
+                            ),
+                            dbc.Collapse(
+                                id="collapse",
+                                is_open=False,
+                                children=html.Div(
+                                    className="border rounded p-3",
+                                    children=[
+                                        html.H5("Login"),
+                                        dbc.Input(type="text", placeholder="Username"),
+                                        dbc.Input(type="password", placeholder="Password", className="mt-3"),
+                                        dbc.Button("Login", color="primary", className="mt-3"),
+                                        html.Hr(),
+                                        html.H5("Date Picker"), 
+                                        # Previous Day Button
+                                        html.Button('<', id='prev-day-button', n_clicks=0, style={'display': 'inline-block', 'border': 'none', 'background': 'none', 'marginRight': '10px', 'fontSize': '24px'}),
+                                        dcc.DatePickerSingle(
+                                            id='date-picker-sidebar',
+                                            
+                                            min_date_allowed=datetime(2020, 1, 1),
+                                            max_date_allowed=today,
+                                            initial_visible_month=today - timedelta(days=1),
+                                            date=today - timedelta(days=1),
+                                            display_format='YYYY / M / D',
+                                            style={'display': 'inline-block', 'border': 'none', 'fontSize': 18}
+                                            # placeholder='Select a date',
+                                            # date=None,
+                                            # display_format='YYYY-MM-DD',
+                                            # className="mt-3"
+                                        ),
+                                        # Next Day Button
+                                        html.Button('>', id='next-day-button', n_clicks=0, style={'display': 'inline-block', 'border': 'none', 'background': 'none', 'marginLeft': '10px', 'fontSize': '24px'}),
+                                        # Live mode: append today's new readings to the charts as they arrive
+                                        dbc.Switch(id='live-switch', label='Live (today)', value=False, className='mt-2'),
+                                        dcc.Interval(id='live-interval', interval=LIVE_REFRESH_MS, disabled=True),
+                                        dcc.Store(id='live-state'),
+                                        # Per-tab id set in the browser, so prefetches are tracked per session
+                                        dcc.Store(id='session-id'),
+                                   
+                                        # Section for Home ID Picker
+                                        html.Div(
+                                            children=[
+                                                html.H5("Home ID Picker"),
+                                                dcc.Dropdown(
+                                                    id='home-id-picker-sidebar',
+                                                    # Options are searched server-side, see update_home_id_options
+                                                    options=[],
+                                                    placeholder='Type to search Home ID',
+                                                    style={'width': '100%', 'marginTop': '10px'}
+                                                )
+                                            ]
+                                        ),
+                                        html.Hr(),
+
+                                        # Section for the multi-day range view
+                                        html.Div(
+                                            children=[
+                                                html.H5("Date Range"),
+                                                dcc.DatePickerRange(
+                                                    id='date-range-picker',
+                                                    min_date_allowed=datetime(2020, 1, 1),
+                                                    max_date_allowed=today,
+                                                    start_date=today - timedelta(days=7),
+                                                    end_date=today - timedelta(days=1),
+                                                    display_format='YYYY / M / D'
+                                                ),
+                                                dcc.Dropdown(
+                                                    id='range-series-picker',
+                                                    options=[
+                                                        {'label': 'Usage', 'value': 'usage'},
+                                                        {'label': 'Four week usage norm', 'value': 'norm'},
+                                                        {'label': 'Water consumption', 'value': 'water_consumption'}
+                                                    ],
+                                                    value='water_consumption',
+                                                    clearable=False,
+                                                    style={'width': '100%', 'marginTop': '10px'}
+                                                ),
+                                                # Download the selected home's history over the date range
+                                                html.Div(
+                                                    className='mt-2',
+                                                    children=[
+                                                        html.A('Export CSV', id='export-csv-link',
+                                                               className='btn btn-outline-secondary btn-sm me-2'),
+                                                        html.A('Export Parquet', id='export-parquet-link',
+                                                               className='btn btn-outline-secondary btn-sm')
+                                                    ]
+                                                )
+                                            ]
+                                        )
+                                    ]
+                                )
+                            )
+                        ]
+                    ),
+                    # Right section for displaying figures and title
+                    dbc.Col(
+                        id='right-section',
+                        width=9,
+                        children=[
+                            html.H1('Water Usage Dashboard', style={'textAlign': 'center'}),
+                            dbc.Tabs(
+                                id='view-tabs',
+                                active_tab='home-tab',
                                 children=[
-                                    html.H5("Login"),
-                                    dbc.Input(type="text", placeholder="Username"),
-                                    dbc.Input(type="password", placeholder="Password", className="mt-3"),
-                                    dbc.Button("Login", color="primary", className="mt-3"),
-                                    html.Hr(),
-                                    html.H5("Date Picker"), 
-                                    # Previous Day Button
-                                    html.Button('<', id='prev-day-button', n_clicks=0, style={'display': 'inline-block', 'border': 'none', 'background': 'none', 'marginRight': '10px', 'fontSize': '24px'}),
-                                    dcc.DatePickerSingle(
-                                        id='date-picker-sidebar',
-                                        
-                                        min_date_allowed=datetime(2020, 1, 1),
-                                        max_date_allowed=datetime.today(),
-                                        initial_visible_month=datetime.today() - timedelta(days=1),
-                                        date=(datetime.today() - timedelta(days=1)).date(),
-                                        display_format='YYYY / M / D',
-                                        style={'display': 'inline-block', 'border': 'none', 'fontSize': 18}
-                                        # placeholder='Select a date',
-                                        # date=None,
-                                        # display_format='YYYY-MM-DD',
-                                        # className="mt-3"
+                                    # Single home view
+                                    dbc.Tab(label='Home', tab_id='home-tab', children=[
+                                    html.Div(
+                                        children=[
+                                            # Previous Day Button
+                                            # html.Button('<', id='prev-day-button', n_clicks=0, style={'display': 'inline-block', 'border': 'none', 'background': 'none', 'marginRight': '10px', 'fontSize': '24px'}),
+                                            # # Date Picker
+                                            # dcc.DatePickerSingle(
+                                            #     id='date-picker',
+                                            #     min_date_allowed=datetime(2020, 1, 1),
+                                            #     max_date_allowed=datetime.today(),
+                                            #     initial_visible_month=datetime.today() - timedelta(days=1),
+                                            #     date=(datetime.today() - timedelta(days=1)).date(),
+                                            #     display_format='YYYY / M / D',
+                                            #     style={'display': 'inline-block', 'border': 'none', 'fontSize': 18}
+                                            # ),
+                                            # # Next Day Button
+                                            # html.Button('>', id='next-day-button', n_clicks=0, style={'display': 'inline-block', 'border': 'none', 'background': 'none', 'marginLeft': '10px', 'fontSize': '24px'}),
+                                   
+                                            # Home ID Picker
+                                            # html.P(id='HomeId', style={'fontSize': 18}),
+                                            # dcc.Dropdown(
+                                            #     id='home-id-picker',
+                                            #     options=[{'label': home_id, 'value': home_id} for home_id in home_ids],
+                                            #     value=home_ids[0],  # Default to the first Home ID
+                                            #     style={'width': '120px', 'display': 'inline-block', 'marginRight': '10px'}
+                                            # ),
+
+                                            # Status and Shape
+                                            html.Div(children=[
+                                                html.P(id='status', style={'fontSize': 18}),
+                                                html.Div(
+                                                    id='status-rect',
+                                                    style={'display': 'flex', 'justifyContent': 'center', 'minHeight': '40px'}
+                                                )
+                                            ], style={'display': 'inline-block', 'verticalAlign': 'middle', 'marginRight': '10px'}),
+                            
+                                            # Activity Level and Shape
+                                            html.Div(children=[
+                                                html.P(id='activity-level', style={'fontSize': 18}),
+                                                html.Div(
+                                                    id='activity-circle',
+                                                    style={'display': 'flex', 'justifyContent': 'center', 'minHeight': '40px'}
+                                                )
+                                            ], style={'display': 'inline-block', 'verticalAlign': 'middle', 'marginRight': '10px'}),
+                                    
+                                            # Regularity Level and Shape
+                                            html.Div(children=[
+                                                html.P(id='regularity-level', style={'fontSize': 18}),
+                                                html.Div(
+                                                    id='regularity-circle',
+                                                    style={'display': 'flex', 'justifyContent': 'center', 'minHeight': '40px'}
+                                                )
+                                            ], style={'display': 'inline-block', 'verticalAlign': 'middle', 'marginRight': '10px'}),
+                                        ],
+                                        style={'textAlign': 'center', 'marginBottom': '20px'}
                                     ),
-                                    # Next Day Button
-                                    html.Button('>', id='next-day-button', n_clicks=0, style={'display': 'inline-block', 'border': 'none', 'background': 'none', 'marginLeft': '10px', 'fontSize': '24px'}),
-                               
-                                    # Section for Home ID Picker
+
                                     html.Div(
+                                        id='right-section-content',
+                                        # className='border rounded p-3',
                                         children=[
-                                            html.H5("Home ID Picker"),
-                                            dcc.Dropdown(
-                                                id='home-id-picker-sidebar',
-                                                options=[{'label': home_id, 'value': home_id} for home_id in home_ids],
-                                                value=home_ids[0],  # Default to the first Home ID
-                                                style={'width': '100%', 'marginTop': '10px'}
+                                            html.H5("Water usage pattern"),
+                                            # className='center-title',  # Apply the center-title class
+                                            dcc.Graph(
+                                                id='usage-graph',
+                                                figure={
+                                                    # Traces and axes are static; update_graphs patches y and the title.
+                                                    # Plain dicts, so building the layout does not load plotly's validators.
+                                                    'data': [{'type': 'bar', 'x0': 1, 'dx': 1, 'y': [], 'name': 'Usage'}],
+                                                    'layout': {
+                                                        'title': {'text': 'Usage'},
+                                                        'height': 250,
+                                                        'xaxis': {'title': {'text': 'Time'}},
+                                                        'yaxis': {'title': {'text': 'Usage'}}
+                                                    }
+                                                }
+                                            ),
+                                            html.Div(
+                                                children=[
+                                                    html.H5("Four Week Water Usage Norm"),
+                                                    dcc.Graph(
+                                                        id='norm-graph',
+                                                        figure={
+                                                            'data': [{'type': 'bar', 'x0': 1, 'dx': 1, 'y': [], 'name': 'Norm'}],
+                                                            'layout': {
+                                                                'title': {'text': 'Norm'},
+                                                                'height': 300,
+                                                                'xaxis': {'title': {'text': 'Time'}},
+                                                                'yaxis': {
+                                                                    'title': {'text': 'Norm'},
+                                                                    'range': [0, 100]
+                                                                }
+                                                            }
+                                                        }
+                                                    )
+                                                ]
+                                            ),
+                                            html.Div(
+                                                children=[
+                                                    html.H5("Water consumption"),
+                                                    dcc.Graph(
+                                                        id='water-consumption-graph',
+                                                        figure={
+                                                            'data': [{
+                                                                'type': 'bar', 'x0': 1, 'dx': 1, 'y': [],
+                                                                'name': 'Water consumption', 'marker': {'color': 'orange'}
+                                                            }],
+                                                            'layout': {
+                                                                'title': {'text': 'Water consumption'},
+                                                                'height': 300,
+                                                                'xaxis': {'title': {'text': 'Time'}},
+                                                                'yaxis': {'title': {'text': 'volume (L/15min)'}}
+                                                            }
+                                                        }
+                                                    )
+                                                ]
+                                            ),
+                                            html.Div(
+                                                id='print-output',
+                                                className='mt-3'
+                                            ),
+                                            html.Div(
+                                                id='range-section',
+                                                children=[
+                                                    html.H5("Date range"),
+                                                    dbc.Progress(
+                                                        id='range-progress', value=0, max=3, striped=True,
+                                                        animated=True, className='mb-2', style={'display': 'none'}
+                                                    ),
+                                                    dcc.Graph(id='range-heatmap'),
+                                                    dcc.Graph(id='range-daily-totals'),
+                                                    dcc.Graph(id='range-hourly-profile'),
+                                                    # Full-resolution series, downsampled server-side to the graph width
+                                                    dcc.Graph(id='range-series-graph'),
+                                                    dcc.Store(id='range-series-width'),
+                                                    # Range and series cached by update_range_graphs for the series graph
+                                                    dcc.Store(id='range-data')
+                                                ]
                                             )
                                         ]
                                     )
-                                ]
-                            )
-                        )
-                    ]
-                ),
-                # Right section for displaying figures and title
-                dbc.Col(
-                    id='right-section',
-                    width=9,
-                    children=[
-                        html.H1('Water Usage Dashboard', style={'textAlign': 'center'}),
-                        html.Div(
-                            children=[
-                                # Previous Day Button
-                                # html.Button('<', id='prev-day-button', n_clicks=0, style={'display': 'inline-block', 'border': 'none', 'background': 'none', 'marginRight': '10px', 'fontSize': '24px'}),
-                                # # Date Picker
-                                # dcc.DatePickerSingle(
-                                #     id='date-picker',
-                                #     min_date_allowed=datetime(2020, 1, 1),
-                                #     max_date_allowed=datetime.today(),
-                                #     initial_visible_month=datetime.today() - timedelta(days=1),
-                                #     date=(datetime.today() - timedelta(days=1)).date(),
-                                #     display_format='YYYY / M / D',
-                                #     style={'display': 'inline-block', 'border': 'none', 'fontSize': 18}
-                                # ),
-                                # # Next Day Button
-                                # html.Button('>', id='next-day-button', n_clicks=0, style={'display': 'inline-block', 'border': 'none', 'background': 'none', 'marginLeft': '10px', 'fontSize': '24px'}),
-                               
-                                # Home ID Picker
-                                # html.P(id='HomeId', style={'fontSize': 18}),
-                                # dcc.Dropdown(
-                                #     id='home-id-picker',
-                                #     options=[{'label': home_id, 'value': home_id} for home_id in home_ids],
-                                #     value=home_ids[0],  # Default to the first Home ID
-                                #     style={'width': '120px', 'display': 'inline-block', 'marginRight': '10px'}
-                                # ),
-
-                                # Status and Shape
-                                html.Div(children=[
-                                    html.P(id='status', style={'fontSize': 18}),
-                                    dcc.Graph(
-                                        id='status-rect',
-                                        config={'displayModeBar': False}
-                                    )
-                                ], style={'display': 'inline-block', 'verticalAlign': 'middle', 'marginRight': '10px'}),
-                        
-                                # Activity Level and Shape
-                                html.Div(children=[
-                                    html.P(id='activity-level', style={'fontSize': 18}),
-                                    dcc.Graph(
-                                        id='activity-circle',
-                                        config={'displayModeBar': False}
-                                    )
-                                ], style={'display': 'inline-block', 'verticalAlign': 'middle', 'marginRight': '10px'}),
-                                
-                                # Regularity Level and Shape
-                                html.Div(children=[
-                                    html.P(id='regularity-level', style={'fontSize': 18}),
-                                    dcc.Graph(
-                                        id='regularity-circle',
-                                        config={'displayModeBar': False}
-                                    )
-                                ], style={'display': 'inline-block', 'verticalAlign': 'middle', 'marginRight': '10px'}),
-                            ],
-                            style={'textAlign': 'center', 'marginBottom': '20px'}
-                        ),
-
-                        html.Div(
-                            id='right-section-content',
-                            # className='border rounded p-3',
-                            children=[
-                                html.H5("Water usage pattern"),
-                                # className='center-title',  # Apply the center-title class
-                                dcc.Graph(
-                                    id='usage-graph',
-                                    figure={
-                                        'data': [],
-                                        'layout': go.Layout(
-                                            title='Usage',
-                                            height=250,
-                                            xaxis={'title': 'Time'},
-                                            yaxis={'title': 'Usage'}
-                                        )
-                                    }
-                                ),
-                                html.Div(
-                                    children=[
-                                        html.H5("Four Week Water Usage Norm"),
-                                        dcc.Graph(
-                                            id='norm-graph',
-                                            figure={
-                                                'data': [],
-                                                'layout': go.Layout(
-                                                    title='Norm',
-                                                    height=300,
-                                                    xaxis={'title': 'Time'},
-                                                    yaxis={'title': 'Norm'}
-                                                )
-                                            }
-                                        )
-                                    ]
-                                ),
-                                html.Div(
-                                    children=[
-                                        html.H5("Water consumption"),
-                                        dcc.Graph(
-                                            id='water-consumption-graph',
-                                            figure={
-                                                'data': [],
-                                                'layout': go.Layout(
-                                                    title='Water consumption',
-                                                    height=300,
-                                                    xaxis={'title': 'Time'},
-                                                    yaxis={'title': 'Water consumption'}
+                                    ]),
+                                    # Fleet-wide status overview for the selected date
+                                    dbc.Tab(label='Fleet overview', tab_id='fleet-tab', children=[
+                                        html.Div(
+                                            id='fleet-section',
+                                            className='mt-3',
+                                            children=[
+                                                dcc.Store(id='fleet-date'),
+                                                dbc.Progress(
+                                                    id='fleet-progress', value=0, max=3, striped=True,
+                                                    animated=True, className='mb-2', style={'display': 'none'}
+                                                ),
+                                                html.H5(id='fleet-title'),
+                                                html.Div(id='fleet-status-summary', className='mb-3'),
+                                                html.H5("Homes in Attention"),
+                                                dash_table.DataTable(
+                                                    id='fleet-attention-table',
+                                                    columns=[
+                                                        {'name': 'Home ID', 'id': 'home_id'},
+                                                        {'name': 'Activity level', 'id': 'activity_level'},
+                                                        {'name': 'Regularity level', 'id': 'regularity_level'},
+                                                        {'name': 'Active score', 'id': 'active_score', 'type': 'numeric'},
+                                                        {'name': 'Correlation coefficient', 'id': 'correlation_coefficient', 'type': 'numeric'}
+                                                    ],
+                                                    data=[],
+                                                    sort_action='native',
+                                                    page_action='native',
+                                                    page_size=25
                                                 )
-                                            }
+                                            ]
                                         )
-                                    ]
-                                ),
-                                html.Div(
-                                    id='print-output',
-                                    className='mt-3'
-                                )
-                            ]
-                        )
-                    ]
-                )
-            ]
-        )
-    ]
-)
+                                    ])
+                                ]
+                            )
+                        ]
+                    )
+                ]
+            )
+        ]
+    )
+
+def serve_layout():
+    return build_layout(datetime.today().date())
+
+app.layout = serve_layout
 
 # Callback to update graphs based on date and home ID selection
 @app.callback(
-    [Output('status', 'children'), Output('status-rect', 'figure'),
-     Output('activity-level', 'children'), Output('activity-circle', 'figure'),
-     Output('regularity-level', 'children'), Output('regularity-circle', 'figure'),
+    [Output('status', 'children'), Output('status-rect', 'children'),
+     Output('activity-level', 'children'), Output('activity-circle', 'children'),
+     Output('regularity-level', 'children'), Output('regularity-circle', 'children'),
      Output('usage-graph', 'figure'), Output('norm-graph', 'figure'),
-     Output('water-consumption-graph', 'figure')], [Input('date-picker-sidebar', 'date'),
-     Input('home-id-picker-sidebar', 'value')]
+     Output('water-consumption-graph', 'figure'), Output('live-state', 'data')],
+    [Input('date-picker-sidebar', 'date'), Input('home-id-picker-sidebar', 'value'),
+     Input('session-id', 'data')]
 )
-def update_graphs(selected_date, selected_home_id):
+@instrumented('update_graphs')
+def update_graphs(selected_date, selected_home_id, session_id=None):
     if selected_date and selected_home_id:
         # Convert selected_date to YYYY-MM-DD format
         selected_date = datetime.strptime(selected_date, '%Y-%m-%d').strftime('%Y-%m-%d')
@@ -314,7 +747,11 @@ def update_graphs(selected_date, selected_home_id):
         previous_day_date_str = datetime.strptime(selected_date, '%Y-%m-%d').strftime('%Y-%m-%d')
              
         # Fetch data using previous_day_date_str and selected_home_id
-        data = get_data_for_date_and_home(previous_day_date_str, selected_home_id)
+        with stage('fetch'):
+            data = get_data_for_date_and_home(previous_day_date_str, selected_home_id)
+
+            # Warm the cache for the prev/next day buttons (this tab's other homes are cancelled)
+            prefetcher.schedule(previous_day_date_str, selected_home_id, session_id)
         if data:
             usage_data = data['usage']
             norm_data = data['norm']
@@ -326,200 +763,378 @@ def update_graphs(selected_date, selected_home_id):
             high_norm = data['high_norm']
             
             # Determine levels and status
-            activity_level, activity_color = determine_activity_level(active_score, low_norm, norm_score, high_norm)
-            regularity_level, regularity_color = determine_regularity_level(corr_coef)
-            status, status_color = determine_status(activity_level, regularity_level)
+            with stage('compute'):
+                activity_level, activity_color = determine_activity_level(active_score, low_norm, norm_score, high_norm)
+                regularity_level, regularity_color = determine_regularity_level(corr_coef)
+                status, status_color = determine_status(activity_level, regularity_level)
             
-            # Create a time series for x-axis
-            time_series = list(range(1, len(usage_data) + 1))
-
-            # Custom status, activity, and regularity figures
-            status_text = 'Status' #f'Status: {status}'
-            status_rect_figure = go.Figure(
-                data=[go.Scatter(
-                    x=[0], y=[0], text=[status],
-                    mode='text',
-                    textfont=dict(size=16, color=status_color)
-                )],
-                layout=go.Layout(
-                    shapes=[
-                        go.layout.Shape(
-                            type="path",
-                            path='M -0.5 -0.25 L 0.5 -0.25 Q 0.6 -0.25 0.6 -0.15 L 0.6 0.15 Q 0.6 0.25 0.5 0.25 L -0.5 0.25 Q -0.6 0.25 -0.6 0.15 L -0.6 -0.15 Q -0.6 -0.25 -0.5 -0.25 Z',
-                            line=dict(color=status_color),
-                            fillcolor='rgba(0,0,0,0)'
-                        )
-                    ],
-                    xaxis=dict(visible=False),
-                    yaxis=dict(visible=False),
-                    height=80,
-                    width=150,
-                    margin=dict(l=20, r=20, t=20, b=20),
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                )
-            )
+            # The x-axis (slots 1..n) comes from x0/dx on the static traces
 
-            activity_level_text = 'Activity Level' #f'Activity Level: {activity_level}'
-            activity_circle_figure = go.Figure(
-                data=[go.Scatter(
-                    x=[0], y=[0], text=['AS'],
-                    mode='text',
-                    textfont=dict(size=16, color=activity_color)
-                )],
-                layout=go.Layout(
-                    shapes=[
-                        go.layout.Shape(
-                            type='circle',
-                            x0=-0.5, y0=-0.5,
-                            x1=0.5, y1=0.5,
-                            line=dict(color=activity_color),
-                            fillcolor='rgba(0,0,0,0)'
-                        )
-                    ],
-                    xaxis=dict(visible=False),
-                    yaxis=dict(visible=False),
-                    height=80,
-                    width=80,
-                    margin=dict(l=20, r=20, t=20, b=20),
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                )
-            )
+            with stage('build'):
+                # Status, activity, and regularity badges (memoized per label and color)
+                status_text = 'Status' #f'Status: {status}'
+                status_badge = make_status_badge(status, status_color)
 
-            regularity_level_text = 'Regularity Level' # f'Regularity Level: {regularity_level}'
-            regularity_circle_figure = go.Figure(
-                data=[go.Scatter(
-                    x=[0], y=[0], text=['CC'],
-                    mode='text',
-                    textfont=dict(size=16, color=regularity_color)
-                )],
-                layout=go.Layout(
-                    shapes=[
-                        go.layout.Shape(
-                            type='circle',
-                            x0=-0.5, y0=-0.5,
-                            x1=0.5, y1=0.5,
-                            line=dict(color=regularity_color),
-                            fillcolor='rgba(0,0,0,0)'
-                        )
-                    ],
-                    xaxis=dict(visible=False),
-                    yaxis=dict(visible=False),
-                    height=80,
-                    width=80,
-                    margin=dict(l=20, r=20, t=20, b=20),
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                )
-            )
+                activity_level_text = 'Activity Level' #f'Activity Level: {activity_level}'
+                activity_badge = make_circle_badge('AS', activity_color)
+
+                regularity_level_text = 'Regularity Level' # f'Regularity Level: {regularity_level}'
+                regularity_badge = make_circle_badge('CC', regularity_color)
 
-            # Update Data Display 1: Usage
-            figure_usage = {
-                'data': [
-                    go.Bar(x=time_series, y=usage_data, name='Usage')
-                ],
-                'layout': go.Layout(
-                    # title=f'Usage for Date: {previous_day_date_str}'
-                    title=f'Active Score: {data["active_score"]} | Correlation Coefficient: {data["corr_coef"]}',
-                    xaxis={'title': 'Time'},
-                    yaxis={'title': 'Usage'}
+                # Update Data Display 1: Usage
+                # title=f'Usage for Date: {previous_day_date_str}'
+                figure_usage = patch_bar_figure(
+                    usage_data,
+                    f'Active Score: {data["active_score"]} | Correlation Coefficient: {data["corr_coef"]}'
                 )
-            }
-            
-            # Update Data Display 2: Norm
-            figure_norm = {
-                'data': [
-                    go.Bar(x=time_series, y=norm_data, name='Norm')
-                ],
-                'layout': go.Layout(
-                    # title=f'Norm for Date: {previous_day_date_str}',
-                    title=f'Low norm: {data["low_norm"]} | Norm: {data["norm_score"]} | High norm: {data["high_norm"]}',
-                    xaxis={'title': 'Time'},
-                    yaxis={
-                        'title': 'Norm',
-                        'range': [0, 100]
-                    }
+
+                # Update Data Display 2: Norm
+                # title=f'Norm for Date: {previous_day_date_str}',
+                figure_norm = patch_bar_figure(
+                    norm_data,
+                    f'Low norm: {data["low_norm"]} | Norm: {data["norm_score"]} | High norm: {data["high_norm"]}'
                 )
-            }
-          
-            # Update Data Display 3: Water consumption
-            figure_water_consumption = {
-                'data': [
-                    go.Bar(x=time_series, y=water_consumption_data, name='Water consumption', marker=dict(color='orange'))
-                ],
-                'layout': go.Layout(
-                    title=f'Water consumption for Date: {previous_day_date_str}',
-                    xaxis={'title': 'Time'},
-                    yaxis={'title': 'volume (L/15min)'}
+
+                # Update Data Display 3: Water consumption
+                figure_water_consumption = patch_bar_figure(
+                    water_consumption_data,
+                    f'Water consumption for Date: {previous_day_date_str}'
                 )
-            }
 
             return (
-                status_text, status_rect_figure,
-                activity_level_text, activity_circle_figure,
-                regularity_level_text, regularity_circle_figure,
-                figure_usage, figure_norm, figure_water_consumption
+                status_text, status_badge,
+                activity_level_text, activity_badge,
+                regularity_level_text, regularity_badge,
+                figure_usage, figure_norm, figure_water_consumption,
                 # f'Usage: {usage_data}, Norm: {norm_data}, Water consumption: {water_consumption_data}'
+                # Slots shown, so live mode only sends the ones after them
+                {
+                    'date': previous_day_date_str,
+                    'home_id': selected_home_id,
+                    'lengths': {
+                        'usage': len(usage_data) if usage_data is not None else 0,
+                        'four_week_usage_norm': len(norm_data) if norm_data is not None else 0,
+                        'water_consumption': len(water_consumption_data) if water_consumption_data is not None else 0
+                    }
+                }
             )
     
-    # Default empty figures and print output
+    # Default empty badges and charts
+    return (
+        '', None,
+        '', None,
+        '', None,
+        patch_bar_figure([], ''),
+        patch_bar_figure([], ''),
+        patch_bar_figure([], ''),
+        None
+    )
+
+# Live updates only run while the switch is on and today is selected (server's date, like the data)
+@app.callback(
+    Output('live-interval', 'disabled'),
+    [Input('live-switch', 'value'), Input('date-picker-sidebar', 'date')]
+)
+def toggle_live_interval(live, selected_date):
+    return not (live and selected_date and selected_date[:10] == today_str())
+
+# Graph each live field is appended to
+LIVE_GRAPHS = {
+    'usage': 'usage-graph',
+    'four_week_usage_norm': 'norm-graph',
+    'water_consumption': 'water-consumption-graph',
+}
+
+# Callback appending today's new 15-minute readings to the charts with extendData
+@app.callback(
+    [Output(LIVE_GRAPHS[field], 'extendData') for field in LIVE_FIELDS]
+    + [Output('live-state', 'data', allow_duplicate=True)],
+    [Input('live-interval', 'n_intervals')],
+    [State('live-state', 'data')],
+    prevent_initial_call=True
+)
+@instrumented('update_live')
+def update_live(n_intervals, live_state):
+    if not live_state:
+        raise PreventUpdate
+
+    with stage('fetch'):
+        new_slots, lengths = live_hub.readings_since(
+            live_state['date'], live_state['home_id'], live_state['lengths']
+        )
+    if not new_slots:
+        raise PreventUpdate
+
+    # Bar traces use x0/dx, so only y needs extending
+    extensions = [
+        ({'y': [new_slots[field]]}, [0]) if field in new_slots else no_update
+        for field in LIVE_FIELDS
+    ]
+    return extensions + [{**live_state, 'lengths': lengths}]
+
+# Clamp overly long ranges to the most recent RANGE_MAX_DAYS days
+def clamp_range(start_date, end_date):
+    start = datetime.strptime(start_date[:10], '%Y-%m-%d')
+    end = datetime.strptime(end_date[:10], '%Y-%m-%d')
+    if (end - start).days >= RANGE_MAX_DAYS:
+        start = end - timedelta(days=RANGE_MAX_DAYS - 1)
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+# Callback to update the range view for a Home ID over a date range
+@app.callback(
+    [Output('range-heatmap', 'figure'), Output('range-daily-totals', 'figure'),
+     Output('range-hourly-profile', 'figure'), Output('range-data', 'data')],
+    [Input('date-range-picker', 'start_date'), Input('date-range-picker', 'end_date'),
+     Input('home-id-picker-sidebar', 'value'), Input('range-series-picker', 'value')],
+    # Runs as a background job; a new date range or home cancels the superseded job
+    background=True,
+    progress=[Output('range-progress', 'value')],
+    progress_default=[0],
+    running=[(Output('range-progress', 'style'), {'display': 'flex'}, {'display': 'none'})]
+)
+@instrumented('update_range_graphs')
+def update_range_graphs(set_progress, start_date, end_date, selected_home_id, series):
+    if not (start_date and end_date and selected_home_id):
+        return go.Figure(), go.Figure(), go.Figure(), None
+
+    start_str, end_str = clamp_range(start_date, end_date)
+
+    with stage('fetch'):
+        data = get_data_for_range(start_str, end_str, selected_home_id)
+    if data is None or len(data['dates']) == 0:
+        return go.Figure(), go.Figure(), go.Figure(), None
+    set_progress([1])
+
+    with stage('compute'):
+        matrix = data[series]
+        dates = list(data['dates'])
+        time_series = list(range(1, matrix.shape[1] + 1))
+        totals = daily_totals(matrix)
+        profile = hour_of_day_profile(matrix)
+    set_progress([2])
+
+    with stage('build'):
+        figure_heatmap = go.Figure(
+            data=[go.Heatmap(x=time_series, y=dates, z=matrix, colorscale='Blues')],
+            layout=go.Layout(
+                title=f'{series} from {start_str} to {end_str}',
+                height=max(300, min(15 * len(dates), 900)),
+                xaxis={'title': 'Time'},
+                yaxis={'title': 'Date', 'autorange': 'reversed'}
+            )
+        )
+
+        figure_daily_totals = go.Figure(
+            data=[go.Bar(x=dates, y=totals, name='Daily total', marker=dict(color='orange'))],
+            layout=go.Layout(
+                title='Daily total',
+                height=300,
+                xaxis={'title': 'Date'},
+                yaxis={'title': series}
+            )
+        )
+
+        figure_hourly_profile = go.Figure(
+            data=[go.Bar(x=list(range(24)), y=profile, name='Hourly profile')],
+            layout=go.Layout(
+                title='Average hour-of-day profile',
+                height=300,
+                xaxis={'title': 'Hour'},
+                yaxis={'title': series}
+            )
+        )
+
+    # The range is now in range_cache; the series graph reads it from there
+    range_data = {'start': start_str, 'end': end_str, 'home_id': selected_home_id, 'series': series}
+    return figure_heatmap, figure_daily_totals, figure_hourly_profile, range_data
+
+# Visible x-axis window from a zoom/pan relayoutData event, or None for the full range
+def zoom_window(relayout_data):
+    import pandas as pd
+    if not relayout_data or relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout_data:
+        bounds = relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    elif 'xaxis.range' in relayout_data:
+        bounds = relayout_data['xaxis.range']
+    else:
+        return None
+    return tuple(pd.Timestamp(bound).to_datetime64().astype('datetime64[m]') for bound in bounds)
+
+# Callback to draw the 15-minute series over the range, downsampled to the graph width.
+# Runs after update_range_graphs has cached the range and only reads that cache;
+# zooming redraws the visible window at finer detail.
+@app.callback(
+    Output('range-series-graph', 'figure'),
+    [Input('range-data', 'data'), Input('range-series-graph', 'relayoutData')],
+    [State('range-series-width', 'data')]
+)
+@instrumented('update_range_series')
+def update_range_series(range_data, relayout_data, graph_width):
+    if not range_data:
+        return go.Figure()
+
+    window = None
+    if dash.callback_context.triggered_id == 'range-series-graph':
+        window = zoom_window(relayout_data)
+        # Relayout events other than zoom/pan (autosize, drag mode) need no new data
+        if window is None and not (relayout_data or {}).get('xaxis.autorange'):
+            raise PreventUpdate
+
+    start_str, end_str = range_data['start'], range_data['end']
+    selected_home_id, series = range_data['home_id'], range_data['series']
+    with stage('fetch'):
+        data = range_cache.get(range_cache_key(start_str, end_str, selected_home_id))
+    # Expired since the job cached it: keep the current figure until the range is reloaded
+    if data is None:
+        raise PreventUpdate
+
+    with stage('compute'):
+        x = slot_timestamps(data['dates'])
+        y = data[series].ravel()
+        if window is not None:
+            visible = (x >= window[0]) & (x <= window[1])
+            x, y = x[visible], y[visible]
+        max_points = int(RANGE_POINTS_PER_PIXEL * (graph_width or RANGE_DEFAULT_WIDTH))
+        x_points, y_points = downsample(x.view('int64'), y, max_points, RANGE_DOWNSAMPLE)
+        x_points = x_points.view('datetime64[m]')
+
+    with stage('build'):
+        # WebGL for dense series, plain bars when few points are shown
+        if len(x_points) >= RANGE_WEBGL_MIN_POINTS:
+            trace = go.Scattergl(x=x_points, y=y_points, mode='lines', name=series)
+        else:
+            trace = go.Bar(x=x_points, y=y_points, name=series)
+        figure = go.Figure(
+            data=[trace],
+            layout=go.Layout(
+                title=f'{series} ({len(x_points)} of {len(x)} points shown)',
+                height=300,
+                xaxis={'title': 'Time'},
+                yaxis={'title': series},
+                # Keep the user's zoom while refining the data for the same range
+                uirevision=f'{selected_home_id}|{start_str}|{end_str}|{series}'
+            )
+        )
+    return figure
+
+# Callback to update the fleet overview when its tab is shown or the date changes
+@app.callback(
+    [Output('fleet-title', 'children'), Output('fleet-status-summary', 'children'),
+     Output('fleet-attention-table', 'data')],
+    [Input('fleet-date', 'data')],
+    # Runs as a background job; identical requests from several users share one job
+    background=True,
+    progress=[Output('fleet-progress', 'value')],
+    progress_default=[0],
+    running=[(Output('fleet-progress', 'style'), {'display': 'flex'}, {'display': 'none'})]
+)
+@instrumented('update_fleet_overview')
+def update_fleet_overview(set_progress, selected_date):
+    if not selected_date:
+        raise PreventUpdate
+
+    with stage('fetch'):
+        df = get_fleet_status(selected_date)
+        materialized = df is not None
+        if not materialized:
+            df = get_fleet_scores(selected_date)
+    if df is None or df.empty:
+        return f'No data for {selected_date}', '', []
+    set_progress([1])
+
+    if not materialized:
+        # Day not materialized yet: classify the raw documents
+        with stage('compute'):
+            df = classify_frame(df)
+    set_progress([2])
+
+    # Status count summary, in the order of the status codes
+    counts = df['status'].value_counts()
+    summary = [
+        dbc.Badge(f'{label}: {counts.get(label, 0)}', color='light', text_color='dark', className='me-2')
+        for label in dict.fromkeys(STATUS_LABELS[1:])
+    ]
+
+    attention = df[df['status'] == 'Attention'].sort_values('active_score')
+    columns = ['home_id', 'activity_level', 'regularity_level', 'active_score', 'correlation_coefficient']
     return (
-        '', go.Figure(),
-        '', go.Figure(),
-        '', go.Figure(),
-        go.Figure(),
-        go.Figure(),
-        go.Figure(),
-        ''
+        f'Fleet status for {selected_date} ({len(df)} homes)',
+        summary,
+        attention[columns].to_dict('records')
     )
 
-# Callback to toggle the collapse state and expand right section width
+# Callback to search Home IDs server-side and default to the first Home ID
 @app.callback(
+    [Output('home-id-picker-sidebar', 'options'),
+     Output('home-id-picker-sidebar', 'value')],
+    [Input('home-id-picker-sidebar', 'search_value')],
+    [State('home-id-picker-sidebar', 'value')]
+)
+@instrumented('update_home_id_options')
+def update_home_id_options(search_value, current_value):
+    if not home_ids.wait_ready(HOME_IDS_READY_TIMEOUT):
+        raise PreventUpdate
+
+    new_value = dash.no_update
+    # Default only on the initial load; a user who cleared the dropdown and is typing keeps it empty
+    if current_value is None and not search_value:
+        current_value = new_value = home_ids.first()
+
+    matches = home_ids.search(search_value, limit=HOME_IDS_SEARCH_LIMIT)
+    # Keep the selected Home ID in the options so the dropdown still shows it
+    if current_value is not None and current_value not in matches:
+        matches.insert(0, current_value)
+
+    return [{'label': home_id, 'value': home_id} for home_id in matches], new_value
+
+# Callback to toggle the collapse state and expand right section width (runs in the browser, see assets/clientside.js)
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='toggle_collapse_and_expand_right_section'),
     [Output("collapse", "is_open"),
      Output("right-section", "width")],
     [Input("toggle-button", "n_clicks")],
     [State("collapse", "is_open"),
      State("right-section", "width")]
 )
-def toggle_collapse_and_expand_right_section(n, is_open, right_width):
-    if n:
-        is_open = not is_open
-        if is_open:
-            return is_open, 9
-        else:
-            return is_open, 12
-    return is_open, right_width
 
-# Callbacks for previous and next day buttons
-@app.callback(
-    Output("date-picker-sidebar", "date"),
-    [Input("prev-day-button", "n_clicks"), Input("next-day-button", "n_clicks")],
-    [State("date-picker-sidebar", "date")]
-    # Output('date-picker', 'date'),
-    # [Input('prev-day-button', 'n_clicks'),
-    #  Input('next-day-button', 'n_clicks')],
-    # [State('date-picker', 'date')]
+# Callback to record the range series graph width for downsampling (runs in the browser)
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='graph_width'),
+    Output('range-series-width', 'data'),
+    [Input('range-series-graph', 'relayoutData')],
+    [State('range-series-graph', 'id')]
 )
-def update_date(prev_clicks, next_clicks, current_date):
-    ctx = dash.callback_context
 
-    if not ctx.triggered:
-        button_id = 'No clicks yet'
-        return current_date
-    else:
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
+# Passes the date to the fleet overview only while its tab is shown, so no job starts otherwise
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='fleet_date'),
+    Output('fleet-date', 'data'),
+    [Input('date-picker-sidebar', 'date'), Input('view-tabs', 'active_tab')]
+)
 
-    current_date = datetime.strptime(current_date, '%Y-%m-%d')
+# Export links for the selected home and date range (runs in the browser)
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='export_links'),
+    [Output('export-csv-link', 'href'), Output('export-parquet-link', 'href')],
+    [Input('date-range-picker', 'start_date'), Input('date-range-picker', 'end_date'),
+     Input('home-id-picker-sidebar', 'value')]
+)
 
-    if button_id == 'prev-day-button':
-        new_date = current_date - timedelta(days=1)
-    elif button_id == 'next-day-button':
-        new_date = current_date + timedelta(days=1)
-    else:
-        new_date = current_date
+# Random id for this tab, set once when the page loads (runs in the browser)
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='session_id'),
+    Output('session-id', 'data'),
+    [Input('session-id', 'id')]
+)
 
-    return new_date.strftime('%Y-%m-%d')
+# Callback for previous and next day buttons (runs in the browser, see assets/clientside.js)
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='update_date'),
+    Output("date-picker-sidebar", "date"),
+    [Input("prev-day-button", "n_clicks"), Input("next-day-button", "n_clicks")],
+    [State("date-picker-sidebar", "date")]
+)
 
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    app.run(debug=True)
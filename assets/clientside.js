@@ -0,0 +1,66 @@
+// Clientside callbacks: pure UI logic that does not need a round trip to the server
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dashboard: {
+        // Toggle the sidebar collapse and widen the right section when it is closed
+        toggle_collapse_and_expand_right_section: function(n, is_open, right_width) {
+            if (n) {
+                is_open = !is_open;
+                return [is_open, is_open ? 9 : 12];
+            }
+            return [is_open, right_width];
+        },
+
+        // Width in pixels of a graph's plot area, used to size server-side downsampling
+        graph_width: function(relayout_data, graph_id) {
+            const element = document.getElementById(graph_id);
+            if (!element || !element.clientWidth) {
+                return window.dash_clientside.no_update;
+            }
+            return element.clientWidth;
+        },
+
+        // Date for the fleet overview, only while its tab is shown
+        fleet_date: function(date, active_tab) {
+            if (active_tab !== 'fleet-tab' || !date) {
+                return window.dash_clientside.no_update;
+            }
+            return date.slice(0, 10);
+        },
+
+        // /export URLs for the selected home and date range
+        export_links: function(start_date, end_date, home_id) {
+            if (!start_date || !end_date || !home_id) {
+                return [null, null];
+            }
+            const query = 'home_id=' + encodeURIComponent(home_id)
+                + '&start=' + start_date.slice(0, 10) + '&end=' + end_date.slice(0, 10);
+            return ['/export?' + query + '&format=csv', '/export?' + query + '&format=parquet'];
+        },
+
+        // Random id for this tab; crypto.randomUUID needs a secure context (https or localhost)
+        session_id: function(component_id) {
+            if (window.crypto && window.crypto.randomUUID) {
+                return window.crypto.randomUUID();
+            }
+            return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+        },
+
+        // Shift the selected date by one day for the previous/next day buttons
+        update_date: function(prev_clicks, next_clicks, current_date) {
+            const triggered = window.dash_clientside.callback_context.triggered;
+            if (!triggered || !triggered.length || !current_date) {
+                return current_date;
+            }
+            const button_id = triggered[0].prop_id.split('.')[0];
+
+            // Work in UTC so daylight saving changes never skip or repeat a day
+            const date = new Date(current_date.slice(0, 10) + 'T00:00:00Z');
+            if (button_id === 'prev-day-button') {
+                date.setUTCDate(date.getUTCDate() - 1);
+            } else if (button_id === 'next-day-button') {
+                date.setUTCDate(date.getUTCDate() + 1);
+            }
+            return date.toISOString().slice(0, 10);
+        }
+    }
+});
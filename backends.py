@@ -0,0 +1,54 @@
+# Data backends behind the dashboard's data access functions.
+#
+# Every backend returns plain meter documents (dicts with the Mongo field names):
+#   get_day(date_str, home_id)                  -> document or None
+#   get_days(date_strs, home_id)                -> {date_str: document or None}
+#   get_range(start_date_str, end_date_str, home_id) -> documents sorted by date
+#   get_date(date_str, fields)                  -> DataFrame of `fields` for every home on a date
+#   distinct_homes()                            -> list of Home IDs
+#
+# SnapshotBackend in snapshot_store.py implements the same interface.
+# batch_neighbours tells the app to load a day together with its neighbours on a
+# cache miss instead of leaving the neighbours to the background prefetcher.
+
+from db import DAY_PROJECTION
+from range_view import RANGE_PROJECTION
+
+
+# Synchronous pymongo backend
+class MongoBackend:
+    # get_days loads a day and its neighbours in one $in query
+    batch_neighbours = True
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get_day(self, date_str, home_id):
+        return self.collection.find_one({'date': date_str, 'home_id': home_id}, DAY_PROJECTION)
+
+    # One query for all requested days of a home
+    def get_days(self, date_strs, home_id):
+        documents = {date_str: None for date_str in date_strs}
+        cursor = self.collection.find(
+            {'home_id': home_id, 'date': {'$in': list(date_strs)}},
+            {**DAY_PROJECTION, 'date': 1}
+        )
+        for document in cursor:
+            documents[document.pop('date')] = document
+        return documents
+
+    def get_range(self, start_date_str, end_date_str, home_id):
+        cursor = self.collection.find(
+            {'home_id': home_id, 'date': {'$gte': start_date_str, '$lte': end_date_str}},
+            RANGE_PROJECTION
+        ).sort('date', 1)
+        return list(cursor)
+
+    def get_date(self, date_str, fields):
+        import pandas as pd
+        projection = {'_id': 0, **{field: 1 for field in fields}}
+        return pd.DataFrame(list(self.collection.find({'date': date_str}, projection)), columns=fields)
+
+    def distinct_homes(self):
+        return self.collection.distinct('home_id')
+
@@ -0,0 +1,108 @@
+# Local job manager for Dash background callbacks (background=True).
+#
+# Jobs run in a subprocess and their results and progress are stored in a diskcache
+# directory, so no external broker is needed and every worker process sees the same jobs.
+# On top of Dash's DiskcacheManager:
+#   - identical requests (same callback and arguments) arriving while a job is running
+#     join that job instead of starting another one, and the result is kept for
+#     result_ttl seconds so every caller can read it
+#   - a job is only terminated (e.g. superseded by a new date or home) once no caller
+#     is waiting on it any more
+#   - progress is left in place for every caller polling the job
+#   - callback and Mongo metrics recorded in the job process are queued in the cache and
+#     merged into the /metrics of the web process that reads the result (or is scraped)
+
+import functools
+import time
+
+from dash import DiskcacheManager
+
+import metrics
+
+# diskcache queue prefix for metrics forwarded by job processes
+METRICS_QUEUE = 'job-metrics'
+
+
+class SharedJobManager(DiskcacheManager):
+    def __init__(self, directory, result_ttl=60, job_ttl=600):
+        try:
+            import diskcache
+        except ImportError:
+            raise ImportError("Background callbacks require the 'diskcache' package (pip install dash[diskcache])")
+        self.result_ttl = result_ttl
+        self.job_ttl = job_ttl
+        # Results are cached per result_ttl window, so a new window recomputes
+        super().__init__(
+            diskcache.Cache(directory),
+            cache_by=[lambda: int(time.time() // result_ttl)],
+            expire=result_ttl
+        )
+
+    @staticmethod
+    def _job_key(key):
+        return f'{key}-job'
+
+    @staticmethod
+    def _waiters_key(job):
+        return f'job-{int(job)}-waiters'
+
+    # The callback runs in the job process; its metrics are queued before the result is stored
+    def make_job_fn(self, fn, progress, key=None):
+        handle = self.handle
+        job_ttl = self.job_ttl
+
+        @functools.wraps(fn)
+        def forwarding_fn(*args, **kwargs):
+            metrics.start_forwarding()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                batch = metrics.stop_forwarding()
+                if batch:
+                    handle.push(batch, prefix=METRICS_QUEUE, expire=job_ttl)
+
+        return super().make_job_fn(forwarding_fn, progress, key)
+
+    # Merge the metrics queued by finished jobs into this process's /metrics
+    def collect_metrics(self):
+        while True:
+            key, batch = self.handle.pull(prefix=METRICS_QUEUE)
+            if key is None:
+                return
+            metrics.merge(batch)
+
+    def get_result(self, key, job):
+        result = super().get_result(key, job)
+        if result is not self.UNDEFINED:
+            self.collect_metrics()
+        return result
+
+    # Join the running job for key if there is one, otherwise start it
+    def call_job_fn(self, key, job_fn, args, context):
+        with self.handle.transact():
+            job = self.handle.get(self._job_key(key))
+            if job is not None and not self.result_ready(key) and self.job_running(job):
+                self.handle.incr(self._waiters_key(job), default=0)
+                return job
+        # Two identical requests racing here may both start a job; the result is the same
+        job = super().call_job_fn(key, job_fn, args, context)
+        self.handle.set(self._job_key(key), job, expire=self.job_ttl)
+        self.handle.set(self._waiters_key(job), 1, expire=self.job_ttl)
+        return job
+
+    # Called when a caller is done with or cancels a job; kills it after the last caller leaves
+    def terminate_job(self, job):
+        if job is None:
+            return
+        with self.handle.transact():
+            # Already terminated (Dash calls this again after reading a result)
+            if self._waiters_key(job) not in self.handle:
+                return
+            waiters = self.handle.decr(self._waiters_key(job))
+            if waiters > 0:
+                return
+            self.handle.delete(self._waiters_key(job))
+        super().terminate_job(job)
+
+    def get_progress(self, key):
+        return self.handle.get(self._make_progress_key(key))
@@ -0,0 +1,79 @@
+# Throughput of the anomaly scan (anomaly_scan.py) over a synthetic snapshot.
+#
+# Writes an Arrow snapshot of N homes x D days (common.synthetic_day, a few homes given
+# overnight leaks), then times the scan with 1 and with --workers processes.
+#
+# Usage: python benchmarks/anomaly.py [--homes 2000] [--days 365] [--workers 4] [--root /tmp/anomaly-snapshot]
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from common import dates_for, home_id_for, synthetic_day, write_results
+
+import anomaly_scan
+from range_view import SLOTS_PER_DAY
+from snapshot_store import ARRAY_FIELDS, SCALAR_FIELDS, partition_dates, partition_path, snapshot_schema
+
+
+def write_synthetic_snapshot(root, homes, days, leak_every=50, seed=0):
+    import pyarrow as pa
+    import pyarrow.ipc
+
+    rng = np.random.default_rng(seed)
+    home_ids = [home_id_for(index) for index in range(homes)]
+    leaking = np.arange(homes) % leak_every == 0
+    for date_str in dates_for(days):
+        day = synthetic_day(rng, homes)
+        day['water_consumption'][leaking, :20] += 0.5
+        columns = [pa.array(home_ids, pa.string())]
+        columns += [pa.array(day[field], pa.float64()) for field in SCALAR_FIELDS]
+        columns += [
+            pa.FixedSizeListArray.from_arrays(pa.array(day[field].ravel(), pa.float64()), SLOTS_PER_DAY)
+            for field in ARRAY_FIELDS
+        ]
+        path = partition_path(root, date_str)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, snapshot_schema()) as writer:
+                writer.write_table(pa.Table.from_arrays(columns, schema=snapshot_schema()))
+    return home_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the anomaly scan")
+    parser.add_argument('--homes', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--root', default='/tmp/anomaly-snapshot')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/anomaly-<time>.json)')
+    args = parser.parse_args()
+
+    dates = dates_for(args.days)
+    start = time.perf_counter()
+    if partition_dates(args.root) != dates:
+        write_synthetic_snapshot(args.root, args.homes, args.days)
+    setup = time.perf_counter() - start
+    home_ids = [home_id_for(index) for index in range(args.homes)]
+
+    results = {'snapshot_setup_s': setup}
+    for workers in sorted({1, args.workers}):
+        start = time.perf_counter()
+        events = anomaly_scan.scan(
+            home_ids, dates[0], dates[-1], ('snapshot', args.root), workers=workers, chunk_size=args.chunk_size
+        )
+        results[f'scan_{workers}_workers_s'] = time.perf_counter() - start
+        results['events'] = events['kind'].value_counts().to_dict()
+        results['leaking_homes_found'] = int(events.loc[events['kind'] == 'overnight_flow', 'home_id'].nunique())
+        results['norm_deviation_share'] = float((events['kind'] == 'norm_deviation').sum() / (args.homes * args.days))
+    print(json.dumps(results, indent=2))
+    path = write_results('anomaly', vars(args), results, args.output)
+    print(f'Results written to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# Measure the response size of the update_graphs callback for one date and Home ID.
+#
+# Posts the same request the browser sends to /_dash-update-component and reports
+# the response bytes per output. For the same document it also builds the response
+# update_graphs sent before the bar charts were patched (a full figure per chart,
+# with the slot index x-axis, axes and layout) and reports both, so the payload
+# saved per callback is measured rather than estimated.
+#
+# Runs against synthetic data in mongomock unless MONGODB_URI is set (see common.load_app).
+#
+# Usage: python benchmarks/callback_payload.py [--homes 20] [--days 7] [--date YYYY-MM-DD] [--home-id H000000]
+
+import argparse
+import json
+
+import plotly.graph_objs as go
+from plotly.io.json import to_json_plotly
+
+from common import UPDATE_GRAPHS_OUTPUTS, dates_for, home_id_for, load_app, update_graphs_request, write_results
+
+FIGURE_OUTPUTS = ['usage-graph', 'norm-graph', 'water-consumption-graph']
+
+
+# The three bar chart figures as update_graphs built them before it sent dash.Patch
+def full_figures(data, date_str):
+    time_series = list(range(1, len(data['usage']) + 1))
+    return {
+        'usage-graph': {
+            'data': [go.Bar(x=time_series, y=data['usage'], name='Usage')],
+            'layout': go.Layout(
+                title=f'Active Score: {data["active_score"]} | Correlation Coefficient: {data["corr_coef"]}',
+                xaxis={'title': 'Time'},
+                yaxis={'title': 'Usage'}
+            )
+        },
+        'norm-graph': {
+            'data': [go.Bar(x=time_series, y=data['norm'], name='Norm')],
+            'layout': go.Layout(
+                title=f'Low norm: {data["low_norm"]} | Norm: {data["norm_score"]} | High norm: {data["high_norm"]}',
+                xaxis={'title': 'Time'},
+                yaxis={'title': 'Norm', 'range': [0, 100]}
+            )
+        },
+        'water-consumption-graph': {
+            'data': [go.Bar(x=time_series, y=data['water_consumption'], name='Water consumption', marker=dict(color='orange'))],
+            'layout': go.Layout(
+                title=f'Water consumption for Date: {date_str}',
+                xaxis={'title': 'Time'},
+                yaxis={'title': 'volume (L/15min)'}
+            )
+        },
+    }
+
+
+def output_bytes(outputs):
+    return {f'{i}.{p}': len(to_json_plotly(outputs[i][p])) for i, p in UPDATE_GRAPHS_OUTPUTS if i in outputs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure update_graphs response size, Patch vs full figures")
+    parser.add_argument('--homes', type=int, default=20)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--date', help='date as YYYY-MM-DD (default: the last synthetic day)')
+    parser.add_argument('--home-id', help='Home ID (default: the first synthetic home)')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/callback_payload-<time>.json)')
+    args = parser.parse_args()
+
+    app = load_app(args.homes, args.days)
+    date_str = args.date or dates_for(args.days)[-1]
+    home_id = args.home_id or home_id_for(0)
+
+    response = app.app.server.test_client().post(
+        '/_dash-update-component', json=update_graphs_request(date_str, home_id)
+    )
+    body = json.loads(response.data)
+    data = app.get_data_for_date_and_home(date_str, home_id)
+    if response.status_code != 200 or not data:
+        raise SystemExit(f'No update_graphs response for {date_str} / {home_id} (status {response.status_code})')
+
+    # Same response with the patched figures swapped for the full ones
+    full_body = json.loads(response.data)
+    for graph_id, figure in full_figures(data, date_str).items():
+        full_body['response'][graph_id]['figure'] = figure
+    full_data = to_json_plotly(full_body)
+
+    patch_bytes = output_bytes(body['response'])
+    full_bytes = output_bytes(full_body['response'])
+    results = {
+        'date': date_str,
+        'home_id': home_id,
+        'status_code': response.status_code,
+        'patch': {'total_bytes': len(response.data), 'output_bytes': patch_bytes},
+        'full_figure': {'total_bytes': len(full_data), 'output_bytes': full_bytes},
+        'figure_bytes_saved': {
+            graph_id: full_bytes[f'{graph_id}.figure'] - patch_bytes[f'{graph_id}.figure'] for graph_id in FIGURE_OUTPUTS
+        },
+        'total_bytes_saved': len(full_data) - len(response.data),
+    }
+    print(json.dumps(results, indent=2))
+    print('Wrote', write_results('callback_payload', vars(args), results, args.output))
+
+
+if __name__ == '__main__':
+    main()
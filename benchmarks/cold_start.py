@@ -0,0 +1,113 @@
+# Cold start: time from launching a fresh server process to its first responses.
+#
+# Each run starts `python benchmarks/cold_start.py --serve` (imports the app and binds
+# a werkzeug server) and polls until the index page answers, then requests the layout
+# and the dependencies as the browser does on page load. Reports the median over runs.
+# With --unreachable the app points at a Mongo host that does not answer, to check that
+# the server still starts and answers while data access is not ready.
+#
+# Usage: python benchmarks/cold_start.py [--runs 5] [--unreachable]
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+from common import ROOT, use_mongomock_unless_configured, write_results
+
+
+def serve(port):
+    use_mongomock_unless_configured()
+    start = time.perf_counter()
+    import app
+    print(f'import_ms {(time.perf_counter() - start) * 1000:.1f}', flush=True)
+
+    from werkzeug.serving import make_server
+    import logging
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    make_server('127.0.0.1', port, app.app.server, threaded=True).serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# Poll url until it answers; returns (ms since start, status code)
+def first_response(url, start, timeout=60):
+    while time.perf_counter() - start < timeout:
+        try:
+            response = requests.get(url, timeout=5)
+            return (time.perf_counter() - start) * 1000, response.status_code
+        except requests.ConnectionError:
+            time.sleep(0.005)
+    raise TimeoutError(url)
+
+
+def run_once(env):
+    port = free_port()
+    url = f'http://127.0.0.1:{port}'
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        # Polling while the child imports would compete with it for the CPU
+        import_ms = float(process.stdout.readline().split()[1])
+        index_ms, _ = first_response(url + '/', start)
+        layout = requests.get(url + '/_dash-layout', timeout=30)
+        layout_ms = (time.perf_counter() - start) * 1000
+        requests.get(url + '/_dash-dependencies', timeout=30)
+        dependencies_ms = (time.perf_counter() - start) * 1000
+        ready = requests.get(url + '/ready', timeout=30)
+        ready_ms = (time.perf_counter() - start) * 1000
+        return {
+            'import_ms': import_ms,
+            'first_response_ms': index_ms,
+            'first_layout_ms': layout_ms,
+            'page_load_ms': dependencies_ms,
+            'layout_status': layout.status_code,
+            'ready_status': ready.status_code,
+            'ready_ms': ready_ms,
+        }
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import-to-first-response time")
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--unreachable', action='store_true', help='point the app at a Mongo host that does not answer')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/cold_start-<time>.json)')
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve)
+        return
+
+    env = dict(os.environ)
+    if args.unreachable:
+        env.update(MONGODB_URI='mongodb://192.0.2.1:27017/', MONGODB_SERVER_SELECTION_TIMEOUT_MS='2000')
+    runs = [run_once(env) for _ in range(args.runs)]
+    results = {
+        key: statistics.median(run[key] for run in runs)
+        for key in runs[0] if key.endswith('_ms')
+    }
+    results['layout_status'] = runs[-1]['layout_status']
+    results['ready_status'] = runs[-1]['ready_status']
+    print(json.dumps(results, indent=2))
+    path = write_results('cold_start', vars(args), results, args.output)
+    print(f'Results written to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+# Shared helpers for the benchmark scripts: synthetic data, app setup and result files
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+sys.path.insert(0, ROOT)
+
+SLOTS_PER_DAY = 96
+
+UPDATE_GRAPHS_OUTPUTS = [
+    ('status', 'children'), ('status-rect', 'children'),
+    ('activity-level', 'children'), ('activity-circle', 'children'),
+    ('regularity-level', 'children'), ('regularity-circle', 'children'),
+    ('usage-graph', 'figure'), ('norm-graph', 'figure'),
+    ('water-consumption-graph', 'figure'), ('live-state', 'data'),
+]
+
+
+def home_id_for(index):
+    return f'H{index:06d}'
+
+
+def dates_for(days, end_date=None):
+    end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.today() - timedelta(days=1)
+    return [(end - timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days - 1, -1, -1)]
+
+
+SYNTHETIC_ARRAY_FIELDS = ['usage', 'four_week_usage_norm', 'water_consumption']
+
+
+# One day of synthetic readings for N homes: (homes x 96) arrays and per-home scores.
+# Water is used in ~30% of slots; four_week_usage_norm is in percent (0-100), as in the dashboard.
+def synthetic_day(rng, homes):
+    usage = np.where(rng.random((homes, SLOTS_PER_DAY)) < 0.3, rng.random((homes, SLOTS_PER_DAY)), 0.0)
+    return {
+        'usage': usage,
+        'four_week_usage_norm': rng.uniform(0, 100, (homes, SLOTS_PER_DAY)),
+        'water_consumption': usage * rng.uniform(5, 15, (homes, SLOTS_PER_DAY)),
+        'active_score': rng.uniform(0, 10, homes),
+        'correlation_coefficient': rng.uniform(0, 1, homes),
+        'low_norm': rng.uniform(1, 3, homes),
+        'norm_active_score': rng.uniform(3, 6, homes),
+        'high_norm': rng.uniform(6, 9, homes),
+    }
+
+
+# Synthetic meter documents for N homes x D days, shaped like SmartWaterMeterActiveMonthNorm
+def synthetic_documents(homes, days, end_date=None, seed=0):
+    rng = np.random.default_rng(seed)
+    for date_str in dates_for(days, end_date):
+        day = synthetic_day(rng, homes)
+        for index in range(homes):
+            document = {'date': date_str, 'home_id': home_id_for(index)}
+            for field, values in day.items():
+                document[field] = values[index].tolist() if field in SYNTHETIC_ARRAY_FIELDS else float(values[index])
+            yield document
+
+
+def seed_collection(collection, homes, days, end_date=None, seed=0, batch_size=1000):
+    batch = []
+    count = 0
+    for document in synthetic_documents(homes, days, end_date, seed):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+        count += len(batch)
+    return count
+
+
+# Unless MONGODB_URI is set, make db.create_client build in-memory mongomock clients
+# (through its client_class) for the app imported afterwards. Returns True if it did.
+def use_mongomock_unless_configured():
+    if os.environ.get('MONGODB_URI'):
+        return False
+    import functools
+    import mongomock
+    import db
+    # Set so variables.env does not point the app at the real server
+    os.environ['MONGODB_URI'] = 'mongodb://localhost:27017/'
+    db.create_client = functools.partial(db.create_client, client_class=mongomock.MongoClient)
+    return True
+
+
+# Import the app against an in-memory mongomock database seeded with synthetic data.
+# Set MONGODB_URI beforehand to benchmark against a real (already seeded) mongod instead.
+def load_app(homes, days, end_date=None, seed=0):
+    mock = use_mongomock_unless_configured()
+    os.environ.setdefault('MONGODB_DATABASE', 'benchmark')
+    os.environ.setdefault('MONGODB_COLLECTION', 'SmartWaterMeterActiveMonthNorm')
+    os.environ.setdefault('MONGODB_ENSURE_INDEXES', 'create')
+    os.chdir(ROOT)
+    import app
+
+    if mock:
+        seed_collection(app.collection, homes, days, end_date, seed)
+        app.home_ids.refresh()
+    return app
+
+
+# Request body for update_graphs, as built by the Dash renderer
+def update_graphs_request(date_str, home_id, session_id='benchmark'):
+    return {
+        'output': '..' + '...'.join(f'{i}.{p}' for i, p in UPDATE_GRAPHS_OUTPUTS) + '..',
+        'outputs': [{'id': i, 'property': p} for i, p in UPDATE_GRAPHS_OUTPUTS],
+        'inputs': [
+            {'id': 'date-picker-sidebar', 'property': 'date', 'value': date_str},
+            {'id': 'home-id-picker-sidebar', 'property': 'value', 'value': home_id},
+            {'id': 'session-id', 'property': 'data', 'value': session_id},
+        ],
+        'changedPropIds': ['date-picker-sidebar.date'],
+        'state': [],
+    }
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    if not samples:
+        return {f'p{point}': None for point in points}
+    ordered = sorted(samples)
+    return {
+        f'p{point}': ordered[min(len(ordered) - 1, int(round(point / 100 * (len(ordered) - 1))))]
+        for point in points
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+# Write results with run metadata to benchmarks/results/<name>-<timestamp>.json (or output)
+def write_results(name, parameters, results, output=None):
+    payload = {
+        'benchmark': name,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'results': results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return output
@@ -0,0 +1,60 @@
+# Compare two benchmark result files and flag regressions.
+#
+# Every numeric value under "results" is matched by its path. Time and latency
+# values (keys ending in _ms or _s) are worse when higher; throughput values
+# (per_second) are worse when lower. Exits with status 1 if any value got worse
+# by more than --threshold percent.
+#
+# Usage: python benchmarks/compare.py baseline.json candidate.json [--threshold 10]
+
+import argparse
+import json
+import sys
+
+
+def flatten(results, prefix=''):
+    values = {}
+    for key, value in results.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            values.update(flatten(value, path + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[path] = value
+    return values
+
+
+# +1 if a higher value is worse, -1 if a lower value is worse, 0 if not comparable
+def direction(path):
+    name = path.lower()
+    if 'per_second' in name or 'speedup' in name:
+        return -1
+    if name.endswith('_ms') or name.endswith('_s') or '_ms.' in name or 'latency' in name:
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed slowdown in percent')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = flatten(json.load(f)['results'])
+    with open(args.candidate) as f:
+        candidate = flatten(json.load(f)['results'])
+
+    regressions = 0
+    for path in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[path], candidate[path]
+        change = (after - before) / before * 100 if before else 0.0
+        worse = direction(path) * change > args.threshold
+        regressions += worse
+        print(f"{'REGRESSION' if worse else '':10} {path:45} {before:12.3f} {after:12.3f} {change:+8.1f}%")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
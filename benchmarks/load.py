@@ -0,0 +1,103 @@
+# HTTP load test of the update_graphs callback endpoint with concurrent simulated users.
+#
+# Each user steps through days for a random home the way an operator does with the
+# prev/next buttons, posting the same request the browser sends to
+# /_dash-update-component. Reports p50/p95/p99 latency and requests/sec.
+#
+# Without --url the app is seeded with synthetic data (see common.load_app) and
+# served in-process by a threaded werkzeug server; with --url an already running
+# server (e.g. gunicorn) is tested instead.
+#
+# Usage: python benchmarks/load.py [--users 20] [--requests 50] [--url http://127.0.0.1:8050]
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import dates_for, home_id_for, load_app, percentiles, update_graphs_request, write_results
+
+
+def start_local_server(app):
+    from werkzeug.serving import make_server
+
+    # Keep werkzeug from logging every request
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app.server, threaded=True)
+    threading.Thread(target=server.serve_forever, name='benchmark-server', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+# One simulated user: a random home, stepping back and forth through days
+def run_user(url, user, requests_per_user, dates, homes, think_time):
+    rng = random.Random(user)
+    session = requests.Session()
+    home_id = home_id_for(rng.randrange(homes))
+    position = rng.randrange(len(dates))
+    latencies, errors = [], 0
+    for _ in range(requests_per_user):
+        position = min(len(dates) - 1, max(0, position + rng.choice((-1, 1))))
+        start = time.perf_counter()
+        try:
+            response = session.post(
+                f'{url}/_dash-update-component',
+                json=update_graphs_request(dates[position], home_id),
+                timeout=30
+            )
+            if response.status_code != 200:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+        if think_time:
+            time.sleep(rng.uniform(0, think_time))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the update_graphs callback endpoint")
+    parser.add_argument('--url', help='base URL of a running dashboard (default: serve in-process)')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=50, help='requests per user')
+    parser.add_argument('--homes', type=int, default=200)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--think-time', type=float, default=0.0, help='max seconds between a user\'s requests')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/load-<time>.json)')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_local_server(load_app(args.homes, args.days).app)
+    dates = dates_for(args.days)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        outcomes = list(executor.map(
+            lambda user: run_user(url, user, args.requests, dates, args.homes, args.think_time),
+            range(args.users)
+        ))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.shutdown()
+
+    latencies = [latency for user_latencies, _ in outcomes for latency in user_latencies]
+    results = {
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in outcomes),
+        'elapsed_s': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'latency_ms': {'mean': sum(latencies) / len(latencies), **percentiles(latencies)},
+    }
+    print(json.dumps(results, indent=2))
+    path = write_results('load', vars(args), results, args.output)
+    print(f'Results written to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# Micro-benchmarks for startup, update_graphs, the classifiers and figure construction.
+#
+# Runs against an in-memory mongomock database seeded with synthetic documents
+# (see common.load_app), so the numbers measure the app's own Python work rather
+# than network latency. Results are written as JSON for compare.py.
+#
+# Usage: python benchmarks/micro.py [--homes 200] [--days 30] [--repeat 200]
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+import plotly
+
+from common import ROOT, dates_for, home_id_for, load_app, write_results
+
+
+# Mean and best time per call in milliseconds
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'mean_ms': sum(samples) / len(samples), 'min_ms': min(samples)}
+
+
+# Wall time of `import app` in a fresh interpreter (load_dotenv, client, layout)
+def startup_time(repeat):
+    code = (
+        'import sys; sys.path.insert(0, "benchmarks"); import common; common.use_mongomock_unless_configured(); '
+        'import time; start = time.perf_counter(); import app; print(time.perf_counter() - start)'
+    )
+    env = dict(os.environ)
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT, env=env, text=True)
+        samples.append(float(output.strip().splitlines()[-1]) * 1000)
+    return {'mean_ms': sum(samples) / len(samples), 'min_ms': min(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the dashboard callbacks")
+    parser.add_argument('--homes', type=int, default=200)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--fleet-size', type=int, default=100000, help='rows for the classifier benchmark')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/micro-<time>.json)')
+    args = parser.parse_args()
+
+    # No background prefetch, so cold timings are not skewed by prefetch threads
+    os.environ.setdefault('PREFETCH_WINDOW', '0')
+    app = load_app(args.homes, args.days)
+    from classifiers import (
+        determine_activity_level, determine_regularity_level, determine_status,
+        activity_level_codes, regularity_level_codes, status_codes
+    )
+
+    rng = random.Random(0)
+    dates = dates_for(args.days)
+    views = [(rng.choice(dates), home_id_for(rng.randrange(args.homes))) for _ in range(args.repeat)]
+    view_iter = iter(views * 2)
+
+    results = {'startup': startup_time(3)}
+
+    # update_graphs with a cold cache (every call fetches) and a warm one (same view)
+    def cold_update():
+        app.data_cache.clear()
+        app.update_graphs(*next(view_iter))
+    results['update_graphs_cold'] = timed(cold_update, args.repeat)
+    results['update_graphs_warm'] = timed(lambda: app.update_graphs(*views[0]), args.repeat)
+
+    outputs = app.update_graphs(*views[0])
+    results['serialize_update_graphs'] = timed(
+        lambda: json.dumps(outputs, cls=plotly.utils.PlotlyJSONEncoder), args.repeat
+    )
+
+    data = app.get_data_for_date_and_home(*views[0])
+    results['badge_and_patch_build'] = timed(lambda: (
+        app.make_status_badge('Attention', 'red'),
+        app.patch_bar_figure(data['usage'], 'title'),
+        app.patch_bar_figure(data['norm'], 'title'),
+        app.patch_bar_figure(data['water_consumption'], 'title'),
+    ), args.repeat)
+
+    start_date, end_date = dates[0], dates[-1]
+    results['update_range_graphs'] = timed(
+        lambda: app.update_range_graphs(lambda progress: None, start_date, end_date, views[0][1], 'water_consumption'),
+        max(1, args.repeat // 10)
+    )
+
+    # Classifiers: scalar if-chains per row vs the vectorized versions
+    n = args.fleet_size
+    generator = np.random.default_rng(0)
+    active = generator.uniform(0, 10, n)
+    low, norm, high = generator.uniform(1, 3, n), generator.uniform(3, 6, n), generator.uniform(6, 9, n)
+    corr = generator.uniform(0, 1, n)
+
+    def scalar_classify():
+        for i in range(n):
+            activity, _ = determine_activity_level(active[i], low[i], norm[i], high[i])
+            regularity, _ = determine_regularity_level(corr[i])
+            determine_status(activity, regularity)
+
+    def vector_classify():
+        status_codes(activity_level_codes(active, low, norm, high), regularity_level_codes(corr))
+
+    results['classify_scalar'] = timed(scalar_classify, 1)
+    results['classify_vectorized'] = timed(vector_classify, 10)
+
+    print(json.dumps(results, indent=2))
+    path = write_results('micro', vars(args), results, args.output)
+    print(f'Results written to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# Count the HTTP callback requests a navigation session sends to the Dash server.
+#
+# Walks the callback graph served at /_dash-dependencies: a UI event fires every
+# callback that takes the changed property as input, and the outputs of those
+# callbacks fire further callbacks. Clientside callbacks run in the browser, so
+# only server callbacks count as requests. The same session is also counted as
+# if every callback ran on the server, to show what clientside callbacks save.
+#
+# Usage: python benchmarks/navigation_requests.py [--next 10] [--prev 5] [--toggles 2]
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import common
+
+
+# Split a callback output spec ("id.prop" or "..a.p...b.q..") into (id, prop) pairs
+def parse_outputs(output):
+    if output.startswith('..') and output.endswith('..'):
+        specs = output[2:-2].split('...')
+    else:
+        specs = [output]
+    return [tuple(spec.rsplit('.', 1)) for spec in specs]
+
+
+# Number of (server, clientside) callback runs caused by a change to (id, prop)
+def callbacks_for_event(dependencies, component_id, prop):
+    server = clientside = 0
+    changed = deque([(component_id, prop)])
+    seen = set()
+    while changed:
+        current = changed.popleft()
+        for index, dependency in enumerate(dependencies):
+            inputs = {(item['id'], item['property']) for item in dependency['inputs']}
+            if current not in inputs or index in seen:
+                continue
+            seen.add(index)
+            if dependency.get('clientside_function'):
+                clientside += 1
+            else:
+                server += 1
+            changed.extend(parse_outputs(dependency['output']))
+    return server, clientside
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count server callback requests per navigation session")
+    parser.add_argument('--next', type=int, default=10, help='next-day clicks in the session')
+    parser.add_argument('--prev', type=int, default=5, help='previous-day clicks in the session')
+    parser.add_argument('--toggles', type=int, default=2, help='sidebar toggles in the session')
+    args = parser.parse_args()
+
+    # Only the callback graph is read, but importing the app connects to MONGODB_URI
+    common.use_mongomock_unless_configured()
+    from app import app
+
+    response = app.server.test_client().get('/_dash-dependencies')
+    dependencies = json.loads(response.data)
+
+    events = (
+        [('next-day-button', 'n_clicks')] * args.next
+        + [('prev-day-button', 'n_clicks')] * args.prev
+        + [('toggle-button', 'n_clicks')] * args.toggles
+    )
+
+    server_requests = clientside_runs = 0
+    for component_id, prop in events:
+        server, clientside = callbacks_for_event(dependencies, component_id, prop)
+        server_requests += server
+        clientside_runs += clientside
+
+    print(json.dumps({
+        'events': len(events),
+        'server_requests': server_requests,
+        'clientside_callbacks': clientside_runs,
+        'server_requests_if_all_server_side': server_requests + clientside_runs,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
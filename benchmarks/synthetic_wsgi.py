@@ -0,0 +1,17 @@
+# wsgi:server seeded with synthetic data (see common.load_app), for load-testing a
+# preloaded multi-worker server. The data is seeded into mongomock in the master
+# process, so every forked worker serves the same copy.
+#
+# Usage: gunicorn -c gunicorn.conf.py --pythonpath benchmarks synthetic_wsgi:server
+#        python benchmarks/load.py --url http://127.0.0.1:8050
+
+import os
+
+os.environ.setdefault('DEFER_BACKGROUND_TASKS', '1')
+
+from common import load_app  # noqa: E402
+
+server = load_app(
+    int(os.getenv('BENCHMARK_HOMES', '200')),
+    int(os.getenv('BENCHMARK_DAYS', '30'))
+).app.server
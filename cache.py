@@ -0,0 +1,180 @@
+# In-process read-through cache for meter documents
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+# Rough size of a cached value in bytes, used to enforce the memory cap
+def estimate_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + estimate_size(item)
+    elif getattr(value, 'base', None) is not None and hasattr(value, 'nbytes'):
+        # NumPy views (e.g. memory-mapped snapshot rows) report only their header in getsizeof
+        size += value.nbytes
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += sys.getsizeof(item)
+    return size
+
+
+# Bounded LRU cache with per-entry TTL, a memory cap and hit/miss counters.
+# An entry stored with ttl=None never expires (it can still be evicted by LRU).
+class TTLLRUCache:
+    def __init__(self, max_entries=1024, ttl=300, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # A lock held by another thread at fork would stay locked in the child (background jobs)
+        os.register_at_fork(after_in_child=self._after_fork)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Return the cached value for key, or default if missing or expired
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    # Store value under key; ttl overrides the default, None means no expiry
+    def set(self, key, value, ttl=...):
+        if ttl is ...:
+            ttl = self.ttl
+        size = estimate_size(value)
+        if self.max_bytes and size > self.max_bytes:
+            return
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.monotonic())
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+# Cache with the TTLLRUCache interface stored in a diskcache directory, shared by every
+# process that opens the same directory (e.g. the workers of a WSGI server). Values are
+# pickled, so each get deserializes a copy instead of returning a shared object.
+# The SQLite connection is opened per process on first use, so the cache can be created
+# before a fork.
+class SharedDiskCache:
+    def __init__(self, directory, ttl=300, max_bytes=64 * 1024 * 1024):
+        try:
+            import diskcache
+        except ImportError:
+            raise ImportError("DATA_CACHE_BACKEND=disk requires the 'diskcache' package (pip install diskcache)")
+        self._diskcache = diskcache
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._store = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def _cache(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._store = self._diskcache.Cache(
+                        self.directory,
+                        size_limit=self.max_bytes,
+                        eviction_policy='least-recently-used',
+                        statistics=True
+                    )
+                    self._pid = os.getpid()
+        return self._store
+
+    def get(self, key, default=None):
+        return self._cache.get(key, default)
+
+    # Store value under key; ttl overrides the default, None means no expiry
+    def set(self, key, value, ttl=...):
+        if ttl is ...:
+            ttl = self.ttl
+        self._cache.set(key, value, expire=ttl)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def invalidate(self, key):
+        self._cache.delete(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    # Hit/miss counts are shared by all processes using the directory
+    def stats(self):
+        hits, misses = self._cache.stats()
+        lookups = hits + misses
+        return {
+            'entries': len(self._cache),
+            'bytes': self._cache.volume(),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._store is not None and self._pid == os.getpid():
+            self._store.close()
+        self._store = None
+        self._pid = None
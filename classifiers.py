@@ -0,0 +1,123 @@
+# Activity, regularity and status classifiers, scalar and vectorized
+
+import numpy as np
+
+# Determine the activity level based on active score and norms
+def determine_activity_level(active_score, low_norm, norm_score, high_norm):
+    if active_score <= low_norm:
+        return 'Abnormal', 'red'
+    elif low_norm < active_score <= norm_score:
+        return 'Low', 'yellow'
+    elif norm_score < active_score <= high_norm:
+        return 'Active', 'blue'
+    elif active_score > high_norm:
+        return 'High', 'green'
+    else:
+        return 'Unknown', 'gray'
+    
+# Determine the regularity level based on correlation coefficient
+def determine_regularity_level(corr_coef):
+    if corr_coef < 0.30:
+        return 'Abnormal', 'red'
+    elif 0.30 <= corr_coef < 0.50:
+        return 'Low', 'yellow'
+    elif 0.50 <= corr_coef < 0.70:
+        return 'Normal', 'blue'
+    elif corr_coef >= 0.70:
+        return 'High', 'green'
+    else:
+        return 'Unknown', 'gray'
+
+# Determine the overall status based on the lowest level of activity and regularity
+def determine_status(activity_level, regularity_level):
+    levels = {'Abnormal': 1, 'Low': 2, 'Normal': 3, 'Active': 4, 'High': 5}
+    lowest_level = min(levels[activity_level], levels[regularity_level])
+
+    if lowest_level == 1:
+        return 'Attention', 'red'
+    elif lowest_level == 2:
+        return 'Normal', 'yellow'
+    elif lowest_level == 3:
+        return 'Normal', 'blue'
+    elif lowest_level == 4:
+        return 'Active', 'blue'
+    elif lowest_level == 5:
+        return 'High', 'green'
+    else:
+        return 'Unknown', 'gray'
+
+# Level codes shared by the vectorized classifiers (0 means Unknown)
+UNKNOWN, ABNORMAL, LOW, NORMAL, ACTIVE, HIGH = 0, 1, 2, 3, 4, 5
+LEVEL_LABELS = np.array(['Unknown', 'Abnormal', 'Low', 'Normal', 'Active', 'High'], dtype=object)
+LEVEL_COLORS = np.array(['gray', 'red', 'yellow', 'blue', 'blue', 'green'], dtype=object)
+
+# Status for each lowest level code, as returned by determine_status
+STATUS_LABELS = np.array(['Unknown', 'Attention', 'Normal', 'Normal', 'Active', 'High'], dtype=object)
+STATUS_COLORS = np.array(['gray', 'red', 'yellow', 'blue', 'blue', 'green'], dtype=object)
+
+# Vectorized determine_activity_level returning level codes
+def activity_level_codes(active_score, low_norm, norm_score, high_norm):
+    active_score = np.asarray(active_score, dtype=float)
+    low_norm = np.asarray(low_norm, dtype=float)
+    norm_score = np.asarray(norm_score, dtype=float)
+    high_norm = np.asarray(high_norm, dtype=float)
+    # Conditions are checked in order, exactly like the if-chain above
+    return np.select(
+        [
+            active_score <= low_norm,
+            (low_norm < active_score) & (active_score <= norm_score),
+            (norm_score < active_score) & (active_score <= high_norm),
+            active_score > high_norm,
+        ],
+        [ABNORMAL, LOW, ACTIVE, HIGH],
+        default=UNKNOWN
+    ).astype(np.int8)
+
+# Vectorized determine_regularity_level returning level codes
+def regularity_level_codes(corr_coef):
+    corr_coef = np.asarray(corr_coef, dtype=float)
+    return np.select(
+        [
+            corr_coef < 0.30,
+            (0.30 <= corr_coef) & (corr_coef < 0.50),
+            (0.50 <= corr_coef) & (corr_coef < 0.70),
+            corr_coef >= 0.70,
+        ],
+        [ABNORMAL, LOW, NORMAL, HIGH],
+        default=UNKNOWN
+    ).astype(np.int8)
+
+# Vectorized determine_status returning the lowest level code (status code).
+# Unlike determine_status, an Unknown level gives Unknown instead of a KeyError.
+def status_codes(activity_codes, regularity_codes):
+    activity_codes = np.asarray(activity_codes, dtype=np.int8)
+    regularity_codes = np.asarray(regularity_codes, dtype=np.int8)
+    lowest = np.minimum(activity_codes, regularity_codes)
+    return np.where((activity_codes == UNKNOWN) | (regularity_codes == UNKNOWN), UNKNOWN, lowest).astype(np.int8)
+
+# Vectorized equivalents of the scalar classifiers returning (labels, colors) arrays
+def determine_activity_levels(active_score, low_norm, norm_score, high_norm):
+    codes = activity_level_codes(active_score, low_norm, norm_score, high_norm)
+    return LEVEL_LABELS[codes], LEVEL_COLORS[codes]
+
+def determine_regularity_levels(corr_coef):
+    codes = regularity_level_codes(corr_coef)
+    return LEVEL_LABELS[codes], LEVEL_COLORS[codes]
+
+def determine_statuses(activity_codes, regularity_codes):
+    codes = status_codes(activity_codes, regularity_codes)
+    return STATUS_LABELS[codes], STATUS_COLORS[codes]
+
+# Classify a DataFrame of documents (one row per home and date), adding level and status columns
+def classify_frame(df):
+    activity = activity_level_codes(
+        df['active_score'], df['low_norm'], df['norm_active_score'], df['high_norm']
+    )
+    regularity = regularity_level_codes(df['correlation_coefficient'])
+    status = status_codes(activity, regularity)
+    df = df.copy()
+    df['activity_level'] = LEVEL_LABELS[activity]
+    df['regularity_level'] = LEVEL_LABELS[regularity]
+    df['status'] = STATUS_LABELS[status]
+    df['status_code'] = status
+    return df
@@ -0,0 +1,78 @@
+# MongoDB connection settings, projections and index bootstrap for the meter collection
+
+import logging
+import os
+
+from pymongo import ASCENDING, MongoClient
+
+logger = logging.getLogger(__name__)
+
+# Compound index serving find_one({'date', 'home_id'}) and per-home date ranges
+DAY_INDEX = [('home_id', ASCENDING), ('date', ASCENDING)]
+DAY_INDEX_NAME = 'home_id_1_date_1'
+
+# Only the fields get_data_for_date_and_home reads
+DAY_PROJECTION = {
+    '_id': 0,
+    'water_consumption': 1,
+    'usage': 1,
+    'four_week_usage_norm': 1,
+    'active_score': 1,
+    'correlation_coefficient': 1,
+    'low_norm': 1,
+    'norm_active_score': 1,
+    'high_norm': 1,
+}
+
+# Read preference names MongoClient accepts for readPreference
+READ_PREFERENCES = {'primary', 'primaryPreferred', 'secondary', 'secondaryPreferred', 'nearest'}
+
+
+# MongoClient keyword arguments built from the MONGODB_* environment variables
+def client_options_from_env():
+    return {
+        'maxPoolSize': int(os.getenv('MONGODB_MAX_POOL_SIZE', '50')),
+        'minPoolSize': int(os.getenv('MONGODB_MIN_POOL_SIZE', '0')),
+        'serverSelectionTimeoutMS': int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        'connectTimeoutMS': int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '5000')),
+        'socketTimeoutMS': int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '10000')),
+        'waitQueueTimeoutMS': int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+        'readPreference': os.getenv('MONGODB_READ_PREFERENCE', 'primaryPreferred'),
+    }
+
+
+# Create a client; client_class can be swapped for a mock (e.g. mongomock.MongoClient)
+def create_client(uri, client_class=MongoClient, **overrides):
+    options = client_options_from_env()
+    options.update(overrides)
+    if options.get('readPreference') not in READ_PREFERENCES:
+        raise ValueError(f"Unknown MONGODB_READ_PREFERENCE: {options.get('readPreference')}")
+    return client_class(uri, **options)
+
+
+# True if an index whose leading keys are (home_id, date) exists
+def has_day_index(collection):
+    for index in collection.index_information().values():
+        if [field for field, _ in index['key'][:2]] == [field for field, _ in DAY_INDEX]:
+            return True
+    return False
+
+
+# Verify the (home_id, date) index, creating it when create=True.
+# Returns True if the index exists afterwards.
+def ensure_day_index(collection, create=False):
+    try:
+        if has_day_index(collection):
+            return True
+        if not create:
+            logger.warning(
+                "Collection %s has no (home_id, date) index; set MONGODB_ENSURE_INDEXES=create to build it",
+                collection.name
+            )
+            return False
+        collection.create_index(DAY_INDEX, name=DAY_INDEX_NAME)
+        logger.info("Created index %s on %s", DAY_INDEX_NAME, collection.name)
+        return True
+    except Exception as e:
+        logger.warning("Could not check indexes on %s: %s", collection.name, e)
+        return False
@@ -0,0 +1,78 @@
+# Server-side downsampling of long time series for plotting
+
+import numpy as np
+
+
+# Drop points where y is NaN (missing slots)
+def _finite(x, y):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    keep = ~np.isnan(y)
+    return x[keep], y[keep]
+
+
+# Largest-Triangle-Three-Buckets: keeps the visual shape of the series with `threshold` points.
+# x must be numeric (e.g. datetime64 viewed as int64) and increasing.
+def lttb(x, y, threshold):
+    x, y = _finite(x, y)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    xf = x.astype(float)
+    # First and last points are always kept; the rest is split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = xf[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = xf[-1], y[-1]
+        # Point in this bucket forming the largest triangle with the previous pick and the next average
+        areas = np.abs(
+            (xf[previous] - avg_x) * (y[start:end] - y[previous])
+            - (xf[previous] - xf[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return x[selected], y[selected]
+
+
+# Min/max per bucket: keeps every spike, returns up to 2 * n_buckets points in x order
+def minmax_buckets(x, y, n_buckets):
+    x, y = _finite(x, y)
+    n = len(x)
+    if n <= 2 * n_buckets or n_buckets < 1:
+        return x, y
+
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    starts = edges[:-1]
+    # reduceat gives the min/max value per bucket; argmin/argmax positions are found per bucket
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    bucket = np.repeat(np.arange(n_buckets), np.diff(edges))
+    is_low = y == lows[bucket]
+    is_high = y == highs[bucket]
+    # First occurrence of the min and of the max in each bucket
+    first_low = np.full(n_buckets, -1)
+    first_high = np.full(n_buckets, -1)
+    low_positions = np.flatnonzero(is_low)
+    high_positions = np.flatnonzero(is_high)
+    first_low[bucket[low_positions[::-1]]] = low_positions[::-1]
+    first_high[bucket[high_positions[::-1]]] = high_positions[::-1]
+    selected = np.unique(np.concatenate([first_low, first_high]))
+    return x[selected], y[selected]
+
+
+# Downsample to at most max_points with the given method ('lttb' or 'minmax')
+def downsample(x, y, max_points, method='lttb'):
+    if method == 'minmax':
+        return minmax_buckets(x, y, max(1, max_points // 2))
+    return lttb(x, y, max_points)
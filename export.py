@@ -0,0 +1,189 @@
+# Streaming CSV/Parquet export of meter history for one or more homes.
+#
+# GET /export?home_id=H001&home_id=H002&start=2024-01-01&end=2024-06-30&format=csv
+#
+# Documents are read from a Mongo cursor (projection, batch size, sorted on the
+# (home_id, date) index), or home by home from a backend's get_range (the snapshot),
+# and written one batch at a time: a CSV chunk or a Parquet row group per batch,
+# yielded straight to the response. Memory stays at one batch (one home's range for
+# a backend) whatever the request. Rows are one 15-minute slot each:
+#   home_id, timestamp, usage, four_week_usage_norm, water_consumption
+# At most max_concurrent exports run at once per process; further requests get a
+# 429 so long downloads cannot take every worker thread from the dashboard.
+
+import io
+import re
+import threading
+from datetime import datetime
+
+import numpy as np
+from flask import Response, jsonify, request
+
+from range_view import SLOTS_PER_DAY, to_slot_row
+
+EXPORT_FIELDS = ['usage', 'four_week_usage_norm', 'water_consumption']
+EXPORT_PROJECTION = {'_id': 0, 'home_id': 1, 'date': 1, **{field: 1 for field in EXPORT_FIELDS}}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# Offset of each slot from midnight
+SLOT_OFFSETS = np.arange(SLOTS_PER_DAY) * np.timedelta64(15, 'm')
+
+
+def export_cursor(collection, home_ids, start_date_str, end_date_str, batch_size=200):
+    return collection.find(
+        {'home_id': {'$in': list(home_ids)}, 'date': {'$gte': start_date_str, '$lte': end_date_str}},
+        EXPORT_PROJECTION
+    ).sort([('home_id', 1), ('date', 1)]).batch_size(batch_size)
+
+
+# Export sources: callables (home_ids, start_date_str, end_date_str) -> documents sorted by
+# home_id then date. The documents are closed when the download ends, if they can be.
+def collection_source(collection, batch_size=200):
+    return lambda home_ids, start_date_str, end_date_str: export_cursor(
+        collection, home_ids, start_date_str, end_date_str, batch_size
+    )
+
+
+# Reads one home at a time through backend.get_range (e.g. SnapshotBackend), so offline
+# exports never touch Mongo
+def backend_source(backend):
+    def documents(home_ids, start_date_str, end_date_str):
+        for home_id in sorted(set(home_ids)):
+            for document in backend.get_range(start_date_str, end_date_str, home_id):
+                yield {**document, 'home_id': home_id}
+    return documents
+
+
+# Consecutive lists of up to batch_size documents from a cursor
+def batches(documents, batch_size):
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# One row per slot for a batch of daily documents
+def slot_frame(documents):
+    import pandas as pd
+    days = np.array([document['date'] for document in documents], dtype='datetime64[m]')
+    frame = pd.DataFrame({
+        'home_id': np.repeat([document['home_id'] for document in documents], SLOTS_PER_DAY),
+        'timestamp': (days[:, None] + SLOT_OFFSETS).ravel(),
+    })
+    for field in EXPORT_FIELDS:
+        frame[field] = np.vstack([to_slot_row(document.get(field)) for document in documents]).ravel()
+    return frame
+
+
+def csv_chunks(documents, batch_size=200):
+    header = True
+    for batch in batches(documents, batch_size):
+        yield slot_frame(batch).to_csv(index=False, header=header, date_format='%Y-%m-%d %H:%M')
+        header = False
+    if header:
+        yield ','.join(['home_id', 'timestamp'] + EXPORT_FIELDS) + '\n'
+
+
+# File-like sink the Parquet writer appends to; drained after every row group
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def parquet_chunks(documents, batch_size=200):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires the 'pyarrow' package (pip install pyarrow)")
+    schema = pa.schema(
+        [('home_id', pa.string()), ('timestamp', pa.timestamp('s'))]
+        + [(field, pa.float64()) for field in EXPORT_FIELDS]
+    )
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema) as writer:
+        for batch in batches(documents, batch_size):
+            writer.write_table(pa.Table.from_pandas(slot_frame(batch), schema=schema, preserve_index=False))
+            yield sink.drain()
+    # The footer is written on close
+    yield sink.drain()
+
+
+def _valid_date(value):
+    if not value or not DATE_PATTERN.match(value):
+        return False
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return False
+    return True
+
+
+# Register GET /export on the Flask server, reading from source (see collection_source);
+# returns a function giving the number of active exports
+def install(server, source, max_concurrent=2, batch_size=200, max_homes=500):
+    slots = threading.BoundedSemaphore(max_concurrent)
+    lock = threading.Lock()
+    active = [0]
+
+    @server.route('/export')
+    def _export():
+        home_ids = [home_id for home_id in request.args.getlist('home_id') if home_id]
+        start_date_str = request.args.get('start')
+        end_date_str = request.args.get('end')
+        fmt = request.args.get('format', 'csv')
+        if not home_ids or len(home_ids) > max_homes:
+            return jsonify(error=f'Give between 1 and {max_homes} home_id parameters'), 400
+        if not (_valid_date(start_date_str) and _valid_date(end_date_str)) or start_date_str > end_date_str:
+            return jsonify(error='start and end must be dates (YYYY-MM-DD) with start <= end'), 400
+        if fmt not in FORMATS:
+            return jsonify(error=f"format must be one of {', '.join(FORMATS)}"), 400
+        if not slots.acquire(blocking=False):
+            return jsonify(error='Too many exports in progress, try again later'), 429, {'Retry-After': '30'}
+        with lock:
+            active[0] += 1
+
+        documents = source(home_ids, start_date_str, end_date_str)
+        chunks = csv_chunks(documents, batch_size) if fmt == 'csv' else parquet_chunks(documents, batch_size)
+
+        # The WSGI server closes the response when the download ends or the client disconnects
+        def finish():
+            close = getattr(documents, 'close', None)
+            if close is not None:
+                close()
+            with lock:
+                active[0] -= 1
+            slots.release()
+
+        name = home_ids[0] if len(home_ids) == 1 else f'{len(home_ids)}-homes'
+        response = Response(
+            chunks,
+            mimetype=FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename="{name}_{start_date_str}_{end_date_str}.{fmt}"'}
+        )
+        response.call_on_close(finish)
+        return response
+
+    return lambda: active[0]
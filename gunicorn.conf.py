@@ -0,0 +1,39 @@
+# Gunicorn settings for wsgi:server, overridable with GUNICORN_* environment variables.
+#
+# Usage: gunicorn -c gunicorn.conf.py wsgi:server
+#
+# Callbacks spend most of their time waiting on MongoDB, so each worker runs a few
+# threads. The app is preloaded once in the master and forked; the Mongo client and
+# background threads are created in each worker after the fork (post_worker_init).
+# Each worker serves /metrics for its own process only, and keeps its own live.LiveHub:
+# a home watched from tabs on several workers is refreshed by each of those workers.
+#
+# Throughput (benchmarks/load.py, 20 users x 30 update_graphs requests, 200 homes x 30 days
+# in mongomock, load generator on the same 1-CPU machine):
+#   in-process werkzeug dev server          82 req/s  p50 205 ms  p95 454 ms
+#   gunicorn 1 worker x 4 threads           89 req/s  p50 179 ms  p95 465 ms
+#   gunicorn 3 workers x 4 threads          71 req/s  p50 111 ms  p95 920 ms
+#   gunicorn 3 workers, DATA_CACHE_BACKEND=disk   70 req/s  p50 139 ms  p95 781 ms, 84% shared hit ratio
+# Workers only add throughput with spare cores; size GUNICORN_WORKERS to the CPUs available.
+# Reproduce with: gunicorn -c gunicorn.conf.py --pythonpath benchmarks synthetic_wsgi:server
+
+import multiprocessing
+import os
+
+from dotenv import dotenv_values
+
+# Read from variables.env without exporting it; the app loads its own settings
+settings = {**dotenv_values('variables.env'), **os.environ}
+
+bind = settings.get('GUNICORN_BIND', '0.0.0.0:8050')
+workers = int(settings.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(settings.get('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+timeout = int(settings.get('GUNICORN_TIMEOUT', '60'))
+preload_app = True
+accesslog = settings.get('GUNICORN_ACCESS_LOG') or None
+
+
+def post_worker_init(worker):
+    import app
+    app.start_background_tasks()
@@ -0,0 +1,74 @@
+# Liveness and readiness endpoints for load balancers and orchestrators.
+#
+#   GET /health  200 as soon as the process serves requests
+#   GET /ready   200 once every readiness check passes, 503 until then, e.g.
+#                {"ready": false, "checks": {"database": false, "home_ids": true}}
+#
+# A check is a callable returning True when its part of data access is usable. Checks
+# may block (a Mongo ping waits up to the server selection timeout), so each one runs
+# in a thread of its own and its result is reused for `interval` seconds; a probe waits
+# at most `timeout` seconds and otherwise gets the previous result.
+
+import os
+import threading
+import time
+
+from flask import jsonify
+
+
+class CachedCheck:
+    def __init__(self, check, interval=5, timeout=1):
+        self._check = check
+        self.interval = interval
+        self.timeout = timeout
+        self._result = False
+        self._checked_at = None
+        self._running = False
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    # A check running in the parent does not exist in the child
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._running = False
+
+    def __call__(self):
+        with self._lock:
+            stale = self._checked_at is None or time.monotonic() - self._checked_at >= self.interval
+            if stale and not self._running:
+                self._running = True
+                self._done = threading.Event()
+                threading.Thread(target=self._run, args=(self._done,), name='health-check', daemon=True).start()
+            done = self._done
+        done.wait(self.timeout)
+        with self._lock:
+            return self._result
+
+    def _run(self, done):
+        try:
+            result = bool(self._check())
+        except Exception as e:
+            # print(f"Health check failed: {e}")
+            result = False
+        with self._lock:
+            self._result = result
+            self._checked_at = time.monotonic()
+            self._running = False
+        done.set()
+
+
+# Register /health and /ready on the Flask server; checks maps a name to a callable
+def install(server, checks, interval=5, timeout=1):
+    checks = {name: CachedCheck(check, interval, timeout) for name, check in checks.items()}
+
+    @server.route('/health')
+    def _health():
+        return jsonify(status='ok')
+
+    @server.route('/ready')
+    def _ready():
+        states = {name: check() for name, check in checks.items()}
+        ready = all(states.values())
+        return jsonify(ready=ready, checks=states), 200 if ready else 503
@@ -0,0 +1,71 @@
+# Cached, background-refreshed index of Home IDs for the dropdown search
+
+import bisect
+import threading
+
+
+# Holds the distinct Home IDs sorted as strings so prefix search is a bisect
+class HomeIdIndex:
+    def __init__(self, load_ids, refresh_interval=600):
+        self._load_ids = load_ids
+        self.refresh_interval = refresh_interval
+        self._keys = []
+        self._ids = []
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Start loading in a daemon thread, then refresh every refresh_interval seconds
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='home-id-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.refresh_interval)
+
+    # Reload the ID list; keeps the previous list if the query fails
+    def refresh(self):
+        try:
+            ids = sorted(self._load_ids(), key=lambda home_id: str(home_id).lower())
+        except Exception as e:
+            # print(f"Error loading home ids: {e}")
+            return False
+        with self._lock:
+            self._ids = ids
+            self._keys = [str(home_id).lower() for home_id in ids]
+        self._ready.set()
+        return True
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def first(self):
+        with self._lock:
+            return self._ids[0] if self._ids else None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids)
+
+    # Return up to limit IDs starting with prefix (case-insensitive)
+    def search(self, prefix, limit=50):
+        prefix = (prefix or '').lower()
+        with self._lock:
+            start = bisect.bisect_left(self._keys, prefix)
+            matches = []
+            for i in range(start, len(self._keys)):
+                if len(matches) >= limit or not self._keys[i].startswith(prefix):
+                    break
+                matches.append(self._ids[i])
+        return matches
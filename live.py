@@ -0,0 +1,207 @@
+# Live updates of today's readings for the homes open in the dashboard.
+#
+# LiveHub keeps one watcher per home holding today's slot arrays. Every session
+# viewing that home reads the newly appended slots from the watcher, so the number
+# of Mongo queries depends on the homes being watched, not on the open tabs.
+# Watchers are refreshed with a $slice projection that fetches only the slots after
+# the ones already held. A refresh is triggered by a change stream on the collection
+# (replica sets) or, on a standalone mongod, by polling every poll_interval seconds.
+# Watchers no session has read for idle_timeout seconds are dropped.
+#
+# The hub lives in process memory, so the fan-out is per process: under gunicorn
+# each worker has its own LiveHub, and a home open in tabs served by W workers is
+# watched (and queried) up to W times. Scale Mongo load by homes x workers.
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from range_view import SLOTS_PER_DAY
+
+logger = logging.getLogger(__name__)
+
+LIVE_FIELDS = ['usage', 'four_week_usage_norm', 'water_consumption']
+
+# Error codes meaning change streams are not available (standalone server)
+CHANGE_STREAM_UNSUPPORTED = {40573, 40324}
+
+
+def today_str():
+    return datetime.today().strftime('%Y-%m-%d')
+
+
+# Today's readings for one home, extended in place by LiveHub
+class HomeWatcher:
+    def __init__(self, date_str, home_id):
+        self.date_str = date_str
+        self.home_id = home_id
+        self.document_id = None
+        self.slots = {field: [] for field in LIVE_FIELDS}
+        self.last_read = time.monotonic()
+
+    def lengths(self):
+        return {field: len(values) for field, values in self.slots.items()}
+
+
+class LiveHub:
+    def __init__(self, collection, mode='auto', poll_interval=30, idle_timeout=120):
+        self.collection = collection
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self._watchers = {}
+        self._lock = threading.Lock()
+        # Bumped when the set of watched homes changes so the change stream is re-filtered
+        self._generation = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.active_mode = None
+        self.refreshes = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='live-hub', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # Slots of date_str after the given per-field lengths, and the new lengths.
+    # Only today's readings are live; other dates return nothing.
+    def readings_since(self, date_str, home_id, lengths):
+        if date_str != today_str():
+            return {}, lengths
+        watcher = self._watcher(date_str, home_id)
+        with self._lock:
+            watcher.last_read = time.monotonic()
+            new_slots = {}
+            for field, values in watcher.slots.items():
+                start = lengths.get(field, 0)
+                if len(values) > start:
+                    new_slots[field] = values[start:]
+            return new_slots, {**lengths, **{field: len(watcher.slots[field]) for field in new_slots}}
+
+    def stats(self):
+        with self._lock:
+            return {'watchers': len(self._watchers), 'refreshes': self.refreshes}
+
+    # The watcher for a home, created and loaded on first use
+    def _watcher(self, date_str, home_id):
+        key = (date_str, home_id)
+        with self._lock:
+            watcher = self._watchers.get(key)
+            if watcher is not None:
+                return watcher
+            watcher = self._watchers[key] = HomeWatcher(date_str, home_id)
+            self._generation += 1
+        self._refresh(watcher)
+        return watcher
+
+    # Fetch only the slots after the ones the watcher already holds
+    def _refresh(self, watcher):
+        with self._lock:
+            lengths = watcher.lengths()
+        projection = {
+            'home_id': 1,
+            **{field: {'$slice': [lengths[field], SLOTS_PER_DAY]} for field in LIVE_FIELDS}
+        }
+        try:
+            document = self.collection.find_one({'date': watcher.date_str, 'home_id': watcher.home_id}, projection)
+        except PyMongoError as e:
+            logger.warning("Could not refresh live readings for %s: %s", watcher.home_id, e)
+            return
+        if not document:
+            return
+        with self._lock:
+            if watcher.document_id is None:
+                watcher.document_id = document['_id']
+                self._generation += 1
+            for field in LIVE_FIELDS:
+                # Appended slots only; a concurrent refresh may already have added them
+                if len(watcher.slots[field]) == lengths[field]:
+                    watcher.slots[field].extend(document.get(field) or [])
+            self.refreshes += 1
+
+    # Drop watchers of past days and ones no session has read recently
+    def _expire(self):
+        now = time.monotonic()
+        today = today_str()
+        with self._lock:
+            expired = [
+                key for key, watcher in self._watchers.items()
+                if key[0] != today or now - watcher.last_read > self.idle_timeout
+            ]
+            for key in expired:
+                del self._watchers[key]
+            if expired:
+                self._generation += 1
+
+    def _snapshot(self):
+        with self._lock:
+            return list(self._watchers.values()), self._generation
+
+    def _run(self):
+        if self.mode in ('auto', 'change_stream'):
+            try:
+                self.active_mode = 'change_stream'
+                self._watch_changes()
+                return
+            except (OperationFailure, NotImplementedError, TypeError) as e:
+                # Standalone mongod, or a mock client without watch()
+                if self.mode == 'change_stream':
+                    logger.warning("Live updates stopped, change streams are not available: %s", e)
+                    self.active_mode = None
+                    return
+                logger.info("Change streams not available, polling for live updates every %ss", self.poll_interval)
+        self.active_mode = 'poll'
+        self._poll()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            self._expire()
+            watchers, _ = self._snapshot()
+            for watcher in watchers:
+                self._refresh(watcher)
+
+    # Change stream filtered to today's documents of the watched homes; reopened
+    # (resuming where it stopped) whenever the watched homes change
+    def _watch_changes(self):
+        resume_token = None
+        last_expire = time.monotonic()
+        while not self._stop.is_set():
+            watchers, generation = self._snapshot()
+            by_id = {watcher.document_id: watcher for watcher in watchers if watcher.document_id is not None}
+            by_home = {watcher.home_id: watcher for watcher in watchers}
+            pipeline = [{'$match': {'$or': [
+                {'operationType': 'insert', 'fullDocument.date': today_str(),
+                 'fullDocument.home_id': {'$in': list(by_home)}},
+                {'operationType': {'$in': ['update', 'replace']}, 'documentKey._id': {'$in': list(by_id)}},
+            ]}}]
+            try:
+                with self.collection.watch(pipeline, resume_after=resume_token, max_await_time_ms=1000) as stream:
+                    while stream.alive and not self._stop.is_set():
+                        change = stream.try_next()
+                        resume_token = stream.resume_token
+                        if change is not None:
+                            if change['operationType'] == 'insert':
+                                watcher = by_home.get(change['fullDocument']['home_id'])
+                            else:
+                                watcher = by_id.get(change['documentKey']['_id'])
+                            if watcher is not None:
+                                self._refresh(watcher)
+                        if time.monotonic() - last_expire > self.poll_interval:
+                            self._expire()
+                            last_expire = time.monotonic()
+                        if self._snapshot()[1] != generation:
+                            break
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAM_UNSUPPORTED:
+                    raise
+                logger.warning("Live change stream failed, reopening: %s", e)
+                self._stop.wait(self.poll_interval)
+            except PyMongoError as e:
+                logger.warning("Live change stream failed, reopening: %s", e)
+                self._stop.wait(self.poll_interval)
@@ -0,0 +1,154 @@
+# Materialize a compact per-(home_id, date) status table from the meter collection.
+#
+# Each row holds the activity/regularity/status levels and codes (see classifiers.py),
+# the scores they were derived from and the day's consumption totals, so fleet
+# queries and alerts can read it directly instead of classifying raw documents.
+# Runs incrementally: the last materialized day is recomputed (it may have been
+# partial) and every newer day is added.
+#
+# Usage: python materialize_status.py [--since YYYY-MM-DD] [--until YYYY-MM-DD] [--full]
+
+import argparse
+import logging
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from classifiers import LEVEL_LABELS, STATUS_LABELS, activity_level_codes, regularity_level_codes, status_codes
+from db import create_client
+from range_view import SLOTS_PER_DAY, to_slot_row
+
+logger = logging.getLogger(__name__)
+
+SCORE_FIELDS = ['active_score', 'correlation_coefficient', 'low_norm', 'norm_active_score', 'high_norm']
+SOURCE_PROJECTION = {
+    '_id': 0, 'home_id': 1, 'date': 1, 'usage': 1, 'water_consumption': 1,
+    **{field: 1 for field in SCORE_FIELDS}
+}
+
+# Lookups by home, by date (fleet page) and by status over time (alerts)
+STATUS_INDEXES = [
+    ([('home_id', ASCENDING), ('date', ASCENDING)], {'unique': True, 'name': 'home_id_1_date_1'}),
+    ([('date', ASCENDING), ('status_code', ASCENDING)], {'name': 'date_1_status_code_1'}),
+    ([('status_code', ASCENDING), ('date', DESCENDING)], {'name': 'status_code_1_date_-1'}),
+]
+
+
+def ensure_status_indexes(target):
+    for keys, options in STATUS_INDEXES:
+        target.create_index(keys, **options)
+
+
+def _daily_totals(documents, field):
+    if not documents:
+        return np.empty(0)
+    return np.nansum(np.vstack([to_slot_row(document.get(field)) for document in documents]), axis=1)
+
+
+# Status rows for one day's documents, classified in one vectorized pass
+def status_rows(documents):
+    documents = list(documents)
+    if not documents:
+        return pd.DataFrame()
+    frame = pd.DataFrame(
+        {field: [document.get(field) for document in documents] for field in ['home_id', 'date'] + SCORE_FIELDS}
+    )
+    scores = frame[SCORE_FIELDS].apply(pd.to_numeric, errors='coerce')
+    activity = activity_level_codes(
+        scores['active_score'], scores['low_norm'], scores['norm_active_score'], scores['high_norm']
+    )
+    regularity = regularity_level_codes(scores['correlation_coefficient'])
+    status = status_codes(activity, regularity)
+
+    frame[SCORE_FIELDS] = scores
+    frame['activity_code'] = activity
+    frame['activity_level'] = LEVEL_LABELS[activity]
+    frame['regularity_code'] = regularity
+    frame['regularity_level'] = LEVEL_LABELS[regularity]
+    frame['status_code'] = status
+    frame['status'] = STATUS_LABELS[status]
+    frame['daily_water_consumption'] = _daily_totals(documents, 'water_consumption')
+    frame['daily_usage'] = _daily_totals(documents, 'usage')
+    frame['slots_reported'] = [
+        min(len(document.get('water_consumption') or []), SLOTS_PER_DAY) for document in documents
+    ]
+    return frame
+
+
+def _to_mongo(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    return value
+
+
+# Classify one date and upsert its rows into target; returns the number of rows
+def materialize_date(source, target, date_str, batch_size=5000):
+    cursor = source.find({'date': date_str}, SOURCE_PROJECTION).batch_size(batch_size)
+    frame = status_rows(cursor)
+    if frame.empty:
+        return 0
+    updated_at = datetime.now(timezone.utc)
+    operations = []
+    for row in frame.to_dict('records'):
+        row = {key: _to_mongo(value) for key, value in row.items()}
+        row['updated_at'] = updated_at
+        operations.append(UpdateOne({'home_id': row['home_id'], 'date': date_str}, {'$set': row}, upsert=True))
+        if len(operations) >= batch_size:
+            target.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        target.bulk_write(operations, ordered=False)
+    return len(frame)
+
+
+# Most recent materialized date, or None if the table is empty
+def last_materialized_date(target):
+    latest = target.find_one({}, {'date': 1}, sort=[('date', DESCENDING)])
+    return latest['date'] if latest else None
+
+
+def materialize(source, target, since=None, until=None, full=False):
+    ensure_status_indexes(target)
+    start = since
+    if not full:
+        last = last_materialized_date(target)
+        # The last materialized day may have been partial, so it is recomputed
+        if last and (start is None or last > start):
+            start = last
+    date_filter = {}
+    if start:
+        date_filter['$gte'] = start
+    if until:
+        date_filter['$lte'] = until
+    dates = sorted(source.distinct('date', {'date': date_filter} if date_filter else {}))
+    for date_str in dates:
+        rows = materialize_date(source, target, date_str)
+        logger.info("Materialized %s rows for %s", rows, date_str)
+    return dates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize the per-home daily status table")
+    parser.add_argument('--since', help='first date to materialize (YYYY-MM-DD)')
+    parser.add_argument('--until', help='last date to materialize (YYYY-MM-DD)')
+    parser.add_argument('--full', action='store_true', help='recompute every date, not just new ones')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    load_dotenv('variables.env')
+    database = create_client(os.getenv('MONGODB_URI'))[os.getenv('MONGODB_DATABASE', os.getenv('MONGODB_DB'))]
+    source = database[os.getenv('MONGODB_COLLECTION')]
+    target = database[os.getenv('MONGODB_STATUS_COLLECTION', 'DailyHomeStatus')]
+
+    dates = materialize(source, target, since=args.since, until=args.until, full=args.full)
+    logger.info("Materialized %s day(s) into %s", len(dates), target.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+# Callback timing, Mongo command latency and a Prometheus text endpoint.
+#
+# Callbacks are wrapped with @instrumented(name) and mark their stages with
+# `with stage('fetch'):` etc. Dash serializes the outputs after the callback
+# returns, so the 'serialize' stage is measured at the request level as the
+# time spent in /_dash-update-component outside the callback itself.
+# Background jobs run in child processes; their observations are forwarded to the
+# web process (start_forwarding/merge) instead of being recorded and lost there.
+
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_state = threading.local()
+
+# Observations held for the web process while forwarding, None when recording locally
+_forwarded = None
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+# Cumulative histogram per label set, rendered in Prometheus text format
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def observe(self, value, *label_values):
+        if _forwarded is not None:
+            _forwarded.append((self.name, label_values, value))
+            return
+        with self._lock:
+            counts = self._series.get(label_values)
+            if counts is None:
+                counts = self._series[label_values] = [0] * len(self.buckets) + [0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    # Background jobs fork from a threaded worker; start the child with a fresh lock
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_values, counts in sorted(self._series.items()):
+                labels = list(zip(self.label_names, label_values))
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", bound)])} {count}')
+                lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", "+Inf")])} {counts[-2]}')
+                lines.append(f'{self.name}_count{_format_labels(labels)} {counts[-2]}')
+                lines.append(f'{self.name}_sum{_format_labels(labels)} {counts[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def inc(self, *label_values, amount=1):
+        if _forwarded is not None:
+            _forwarded.append((self.name, label_values, amount))
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(zip(self.label_names, label_values))} {value}')
+        return lines
+
+
+callback_seconds = Histogram(
+    'dashboard_callback_duration_seconds', 'Time spent in Dash callbacks.', ('callback',)
+)
+callback_stage_seconds = Histogram(
+    'dashboard_callback_stage_duration_seconds', 'Time spent per callback stage.', ('callback', 'stage')
+)
+callback_errors = Counter(
+    'dashboard_callback_errors_total', 'Callbacks that raised an exception.', ('callback',)
+)
+slow_callbacks = Counter(
+    'dashboard_slow_callbacks_total', 'Callbacks slower than the slow-callback threshold.', ('callback',)
+)
+mongo_command_seconds = Histogram(
+    'dashboard_mongo_command_duration_seconds', 'MongoDB command latency.', ('command',)
+)
+mongo_command_failures = Counter(
+    'dashboard_mongo_command_failures_total', 'MongoDB commands that failed.', ('command',)
+)
+
+_metrics = [
+    callback_seconds, callback_stage_seconds, callback_errors, slow_callbacks,
+    mongo_command_seconds, mongo_command_failures,
+]
+_gauges = []
+_collectors = []
+
+# Callbacks slower than this (in seconds) are logged with their arguments; None disables
+slow_callback_threshold = None
+
+
+# Export values computed at scrape time, e.g. cache stats. fn returns {label_value: number}.
+def register_gauge(name, help_text, label_name, fn):
+    _gauges.append((name, help_text, label_name, fn))
+
+
+def _render_gauges():
+    lines = []
+    for name, help_text, label_name, fn in _gauges:
+        try:
+            values = fn()
+        except Exception as e:
+            logger.warning("Could not collect %s: %s", name, e)
+            continue
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+        for label_value, value in sorted(values.items()):
+            lines.append(f'{name}{_format_labels([(label_name, label_value)])} {value}')
+    return lines
+
+
+# Run fn before every render, e.g. to merge metrics forwarded by job processes
+def register_collector(fn):
+    _collectors.append(fn)
+
+
+def render():
+    for fn in _collectors:
+        try:
+            fn()
+        except Exception as e:
+            logger.warning("Could not collect forwarded metrics: %s", e)
+    lines = []
+    for metric in _metrics:
+        lines += metric.render()
+    lines += _render_gauges()
+    return '\n'.join(lines) + '\n'
+
+
+# Hold this process's observations instead of recording them (in a background job,
+# whose metrics would be lost with the process); stop_forwarding returns them
+def start_forwarding():
+    global _forwarded
+    _forwarded = []
+
+
+def stop_forwarding():
+    global _forwarded
+    batch, _forwarded = _forwarded or [], None
+    return batch
+
+
+# Record observations forwarded by another process
+def merge(batch):
+    by_name = {metric.name: metric for metric in _metrics}
+    for name, label_values, value in batch:
+        metric = by_name.get(name)
+        if isinstance(metric, Histogram):
+            metric.observe(value, *label_values)
+        elif isinstance(metric, Counter):
+            metric.inc(*label_values, amount=value)
+
+
+# Time a stage of the current callback (fetch, compute, build)
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        callback = getattr(_state, 'callback', None)
+        if callback is not None:
+            callback_stage_seconds.observe(time.perf_counter() - start, callback, name)
+
+
+# Decorator recording total and per-stage time of a callback, logging slow calls
+def instrumented(name):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            previous = getattr(_state, 'callback', None)
+            _state.callback = name
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except Exception as e:
+                # PreventUpdate is normal control flow, not an error
+                if type(e).__name__ != 'PreventUpdate':
+                    callback_errors.inc(name)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                _state.callback = previous
+                callback_seconds.observe(elapsed, name)
+                _record_request_callback(name, elapsed)
+                if slow_callback_threshold is not None and elapsed > slow_callback_threshold:
+                    slow_callbacks.inc(name)
+                    logger.warning("Slow callback %s took %.0f ms with arguments %r", name, elapsed * 1000, args)
+        return wrapper
+    return decorator
+
+
+def _record_request_callback(name, elapsed):
+    try:
+        g.dashboard_callback = (name, elapsed)
+    except RuntimeError:
+        # Called outside a Flask request (e.g. from a benchmark)
+        pass
+
+
+# Pymongo command listener feeding mongo_command_seconds
+class CommandLatencyListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_seconds.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        mongo_command_seconds.observe(event.duration_micros / 1e6, event.command_name)
+        mongo_command_failures.inc(event.command_name)
+
+
+# Register the Mongo listener; only clients created afterwards report to it
+def install_mongo_listener():
+    monitoring.register(CommandLatencyListener())
+
+
+# Register the Flask hooks and the /metrics route
+def install(server, slow_callback_ms=None):
+    global slow_callback_threshold
+    slow_callback_threshold = slow_callback_ms / 1000 if slow_callback_ms else None
+
+    @server.before_request
+    def _start_request_timer():
+        g.dashboard_request_start = time.perf_counter()
+
+    @server.after_request
+    def _record_serialize_stage(response):
+        callback = getattr(g, 'dashboard_callback', None)
+        start = getattr(g, 'dashboard_request_start', None)
+        if callback is not None and start is not None and request.path.endswith('/_dash-update-component'):
+            name, elapsed = callback
+            overhead = time.perf_counter() - start - elapsed
+            callback_stage_seconds.observe(max(overhead, 0.0), name, 'serialize')
+        return response
+
+    @server.route('/metrics')
+    def _metrics_endpoint():
+        return Response(render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,135 @@
+# Background prefetch of neighbouring days into the shared document cache
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+
+# Days within `window` of date_str, nearest first, excluding date_str and future days
+def neighbour_dates(date_str, window):
+    day = datetime.strptime(date_str, '%Y-%m-%d')
+    today = datetime.today().strftime('%Y-%m-%d')
+    dates = []
+    for offset in range(1, window + 1):
+        for neighbour in (day - timedelta(days=offset), day + timedelta(days=offset)):
+            if neighbour.strftime('%Y-%m-%d') <= today:
+                dates.append(neighbour.strftime('%Y-%m-%d'))
+    return dates
+
+
+# Loads the days around the one being viewed so prev/next clicks hit the cache.
+# Each queued day remembers the sessions (browser tabs) waiting for it; when a
+# session switches home, the days only it was waiting for are cancelled if they
+# have not started. Past max_pending queued days the oldest not yet started are
+# dropped as well, whichever session queued them.
+class Prefetcher:
+    def __init__(self, fetch, cache, ttl_for_date, window=1, max_workers=2, max_pending=32, max_tracked=1024):
+        self._fetch = fetch
+        self._cache = cache
+        self._ttl_for_date = ttl_for_date
+        self.window = window
+        self.max_pending = max_pending
+        self.max_tracked = max_tracked
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+        # Sessions waiting for each pending key (None for callers without a session)
+        self._owners = {}
+        # Home last scheduled by each session, least recently active first
+        self._sessions = OrderedDict()
+        # Keys loaded by a prefetch and not read yet, oldest first (any cache backend)
+        self._prefetched = OrderedDict()
+        self.scheduled = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.served = 0
+
+    # Queue D-window..D+window (excluding D and future days) for home_id on behalf of
+    # session_id; a session's earlier loads for another home are cancelled first
+    def schedule(self, date_str, home_id, session_id=None):
+        if self.window <= 0:
+            return
+        with self._lock:
+            if session_id is not None:
+                if self._sessions.get(session_id, home_id) != home_id:
+                    self._cancel_session(session_id)
+                self._sessions[session_id] = home_id
+                self._sessions.move_to_end(session_id)
+                while len(self._sessions) > self.max_tracked:
+                    self._sessions.popitem(last=False)
+            for neighbour_str in neighbour_dates(date_str, self.window):
+                key = (neighbour_str, home_id)
+                if key not in self._pending:
+                    if key in self._cache:
+                        continue
+                    self._pending[key] = self._executor.submit(self._load, key)
+                    self.scheduled += 1
+                self._owners.setdefault(key, set()).add(session_id)
+            self._trim_pending()
+
+    # Record a cache hit; counts it as served if the entry came from a prefetch
+    def note_hit(self, key):
+        with self._lock:
+            if key in self._prefetched:
+                del self._prefetched[key]
+                self.served += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'scheduled': self.scheduled,
+                'completed': self.completed,
+                'cancelled': self.cancelled,
+                'served': self.served,
+                'pending': len(self._pending),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._cancel_pending()
+        self._executor.shutdown(wait=False)
+
+    def _load(self, key):
+        date_str, home_id = key
+        try:
+            data = self._fetch(date_str, home_id)
+            if data is not None:
+                self._cache.set(key, data, ttl=self._ttl_for_date(date_str))
+                with self._lock:
+                    self._prefetched[key] = None
+                    self._prefetched.move_to_end(key)
+                    while len(self._prefetched) > self.max_tracked:
+                        self._prefetched.popitem(last=False)
+            with self._lock:
+                self.completed += 1
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+                self._owners.pop(key, None)
+
+    def _cancel_pending(self):
+        for future in self._pending.values():
+            if future.cancel():
+                self.cancelled += 1
+        self._pending.clear()
+        self._owners.clear()
+
+    # Cancel the queued loads no other session is waiting for
+    def _cancel_session(self, session_id):
+        for key, owners in list(self._owners.items()):
+            owners.discard(session_id)
+            if not owners and self._pending[key].cancel():
+                self.cancelled += 1
+                del self._pending[key]
+                del self._owners[key]
+
+    # Drop the oldest queued loads beyond max_pending; ones already running are left to finish
+    def _trim_pending(self):
+        for key, future in list(self._pending.items()):
+            if len(self._pending) <= self.max_pending:
+                break
+            if future.cancel():
+                self.cancelled += 1
+                del self._pending[key]
+                self._owners.pop(key, None)
@@ -0,0 +1,66 @@
+# Vectorized stacking and aggregation of per-day meter documents for the range view
+
+import warnings
+
+import numpy as np
+
+# Number of 15-minute slots in one daily document
+SLOTS_PER_DAY = 96
+SLOTS_PER_HOUR = 4
+
+# Document field for each series shown in the range view
+RANGE_SERIES = {
+    'usage': 'usage',
+    'norm': 'four_week_usage_norm',
+    'water_consumption': 'water_consumption',
+}
+
+RANGE_PROJECTION = {'_id': 0, 'date': 1, **{field: 1 for field in RANGE_SERIES.values()}}
+
+
+# Convert one slot array to a fixed-length float row, padding missing slots with NaN
+def to_slot_row(values):
+    row = np.full(SLOTS_PER_DAY, np.nan)
+    if values is not None and len(values):
+        values = np.asarray(values[:SLOTS_PER_DAY], dtype=float)
+        row[:len(values)] = values
+    return row
+
+
+# Stack documents (sorted by date) into one (days x 96) matrix per series
+def stack_documents(docs):
+    docs = list(docs)
+    stacked = {'dates': np.array([doc['date'] for doc in docs], dtype=object)}
+    for name, field in RANGE_SERIES.items():
+        if docs:
+            stacked[name] = np.vstack([to_slot_row(doc.get(field)) for doc in docs])
+        else:
+            stacked[name] = np.empty((0, SLOTS_PER_DAY))
+    return stacked
+
+
+# Total per day, ignoring missing slots
+def daily_totals(matrix):
+    if matrix.shape[0] == 0:
+        return np.empty(0)
+    return np.nansum(matrix, axis=1)
+
+
+# Mean hourly total across days (24 values), ignoring missing slots
+def hour_of_day_profile(matrix):
+    if matrix.shape[0] == 0:
+        return np.full(24, np.nan)
+    hourly = np.nansum(matrix.reshape(matrix.shape[0], 24, SLOTS_PER_HOUR), axis=2)
+    # Hours with no readings at all should not pull the mean towards zero
+    missing = np.isnan(matrix).reshape(matrix.shape[0], 24, SLOTS_PER_HOUR).all(axis=2)
+    hourly[missing] = np.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return np.nanmean(hourly, axis=0)
+
+
+# Timestamp of every slot of a stacked range, as a flat datetime64 array matching matrix.ravel()
+def slot_timestamps(dates):
+    days = np.asarray(dates, dtype='datetime64[m]')
+    offsets = np.arange(SLOTS_PER_DAY) * np.timedelta64(15, 'm')
+    return (days[:, None] + offsets[None, :]).ravel()
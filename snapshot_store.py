@@ -0,0 +1,213 @@
+# Local snapshot of the meter collection as date-partitioned Arrow IPC files.
+#
+# Each day is one file, <root>/date=YYYY-MM-DD/data.arrow, with one row per home
+# sorted by home_id. The 96-slot arrays are stored as fixed-size list columns.
+# Reads memory-map the file, so the slot arrays handed to the dashboard are
+# zero-copy NumPy views into the page cache.
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from range_view import SLOTS_PER_DAY, to_slot_row
+
+SCALAR_FIELDS = ['active_score', 'correlation_coefficient', 'low_norm', 'norm_active_score', 'high_norm']
+ARRAY_FIELDS = ['usage', 'four_week_usage_norm', 'water_consumption']
+SNAPSHOT_PROJECTION = {'_id': 0, 'home_id': 1, **{field: 1 for field in SCALAR_FIELDS + ARRAY_FIELDS}}
+
+PARTITION_PREFIX = 'date='
+PARTITION_FILE = 'data.arrow'
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError("DATA_BACKEND=snapshot requires the 'pyarrow' package (pip install pyarrow)")
+    return pyarrow
+
+
+def snapshot_schema():
+    pa = _pyarrow()
+    return pa.schema(
+        [('home_id', pa.string())]
+        + [(field, pa.float64()) for field in SCALAR_FIELDS]
+        + [(field, pa.list_(pa.float64(), SLOTS_PER_DAY)) for field in ARRAY_FIELDS]
+    )
+
+
+def partition_path(root, date_str):
+    return os.path.join(root, PARTITION_PREFIX + date_str, PARTITION_FILE)
+
+
+# Dates that have a partition under root, sorted
+def partition_dates(root):
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name[len(PARTITION_PREFIX):] for name in os.listdir(root)
+        if name.startswith(PARTITION_PREFIX) and os.path.exists(os.path.join(root, name, PARTITION_FILE))
+    )
+
+
+# True if the partition was written after its day was over, so it holds the final documents
+def partition_is_complete(root, date_str):
+    written = datetime.fromtimestamp(os.path.getmtime(partition_path(root, date_str)))
+    return written.strftime('%Y-%m-%d') > date_str
+
+
+# Build an Arrow table (sorted by home_id) from one day's documents
+def documents_to_table(documents):
+    pa = _pyarrow()
+    documents = sorted(documents, key=lambda document: str(document['home_id']))
+    columns = [pa.array([str(document['home_id']) for document in documents], pa.string())]
+    for field in SCALAR_FIELDS:
+        columns.append(pa.array([document.get(field) for document in documents], pa.float64()))
+    for field in ARRAY_FIELDS:
+        if documents:
+            slots = np.vstack([to_slot_row(document.get(field)) for document in documents])
+        else:
+            slots = np.empty((0, SLOTS_PER_DAY))
+        columns.append(pa.FixedSizeListArray.from_arrays(pa.array(slots.ravel(), pa.float64()), SLOTS_PER_DAY))
+    return pa.Table.from_arrays(columns, schema=snapshot_schema())
+
+
+# Write one day's partition atomically (readers never see a half-written file)
+def write_partition(root, date_str, documents):
+    pa = _pyarrow()
+    path = partition_path(root, date_str)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = documents_to_table(documents)
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return table.num_rows
+
+
+# One memory-mapped partition with a Home ID -> row lookup and zero-copy column views
+class _Partition:
+    def __init__(self, path):
+        pa = _pyarrow()
+        self.mtime = os.path.getmtime(path)
+        source = pa.memory_map(path, 'r')
+        table = pa.ipc.open_file(source).read_all().combine_chunks()
+        self.home_ids = table.column('home_id').to_pylist()
+        self.rows = {home_id: row for row, home_id in enumerate(self.home_ids)}
+        self.scalars = {
+            field: table.column(field).to_numpy(zero_copy_only=False) for field in SCALAR_FIELDS
+        }
+        self.arrays = {}
+        for field in ARRAY_FIELDS:
+            values = table.column(field).chunk(0).flatten() if table.num_rows else pa.array([], pa.float64())
+            self.arrays[field] = values.to_numpy(zero_copy_only=True).reshape(-1, SLOTS_PER_DAY)
+
+    def document(self, row, fields):
+        document = {}
+        for field in fields:
+            if field in self.arrays:
+                document[field] = self.arrays[field][row]
+            elif field in self.scalars:
+                value = self.scalars[field][row]
+                document[field] = None if np.isnan(value) else float(value)
+        return document
+
+
+# Backend serving reads from the snapshot (same interface as backends.MongoBackend)
+class SnapshotBackend:
+    batch_neighbours = True
+
+    def __init__(self, root, max_open_partitions=400):
+        self.root = root
+        self.max_open_partitions = max_open_partitions
+        self._partitions = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Open (or reuse) the partition for a date; reopens it if the sync job rewrote it
+    def _partition(self, date_str):
+        path = partition_path(self.root, date_str)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            partition = self._partitions.get(date_str)
+            if partition is not None and partition.mtime == mtime:
+                self._partitions.move_to_end(date_str)
+                return partition
+        partition = _Partition(path)
+        with self._lock:
+            self._partitions[date_str] = partition
+            self._partitions.move_to_end(date_str)
+            while len(self._partitions) > self.max_open_partitions:
+                self._partitions.popitem(last=False)
+        return partition
+
+    def _document(self, date_str, home_id, fields):
+        partition = self._partition(date_str)
+        if partition is None:
+            return None
+        row = partition.rows.get(str(home_id))
+        if row is None:
+            return None
+        return partition.document(row, fields)
+
+    def get_day(self, date_str, home_id):
+        return self._document(date_str, home_id, SCALAR_FIELDS + ARRAY_FIELDS)
+
+    def get_days(self, date_strs, home_id):
+        return {date_str: self.get_day(date_str, home_id) for date_str in date_strs}
+
+    def get_range(self, start_date_str, end_date_str, home_id):
+        documents = []
+        for date_str in partition_dates(self.root):
+            if start_date_str <= date_str <= end_date_str:
+                document = self._document(date_str, home_id, ARRAY_FIELDS)
+                if document is not None:
+                    document['date'] = date_str
+                    documents.append(document)
+        return documents
+
+    # Fields of several homes on one date, row-aligned with home_ids (NaN where a home is missing)
+    def get_rows(self, date_str, home_ids, fields):
+        partition = self._partition(date_str)
+        if partition is None:
+            rows = np.full(len(home_ids), -1)
+        else:
+            rows = np.array([partition.rows.get(str(home_id), -1) for home_id in home_ids], dtype=int)
+        present = rows >= 0
+        columns = {}
+        for field in fields:
+            shape = (len(home_ids), SLOTS_PER_DAY) if field in ARRAY_FIELDS else len(home_ids)
+            values = np.full(shape, np.nan)
+            if present.any():
+                source = partition.arrays[field] if field in ARRAY_FIELDS else partition.scalars[field]
+                values[present] = source[rows[present]]
+            columns[field] = values
+        return columns
+
+    def get_date(self, date_str, fields):
+        import pandas as pd
+        partition = self._partition(date_str)
+        if partition is None:
+            return pd.DataFrame(columns=fields)
+        columns = {}
+        for field in fields:
+            if field == 'home_id':
+                columns[field] = partition.home_ids
+            elif field in partition.scalars:
+                columns[field] = partition.scalars[field]
+        return pd.DataFrame(columns, columns=fields)
+
+    def distinct_homes(self):
+        home_ids = set()
+        for date_str in partition_dates(self.root):
+            partition = self._partition(date_str)
+            if partition is not None:
+                home_ids.update(partition.home_ids)
+        return sorted(home_ids)
@@ -0,0 +1,67 @@
+# Incremental sync of the meter collection into the local Arrow snapshot.
+#
+# Only days after the last complete partition are exported. A partition is
+# complete when it was written after its day was over; today's partial
+# partition (written with --include-today) is rewritten on the next run.
+#
+# Usage: python snapshot_sync.py [--since YYYY-MM-DD] [--include-today] [--path snapshot]
+
+import argparse
+import logging
+import os
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from db import create_client
+from snapshot_store import SNAPSHOT_PROJECTION, partition_dates, partition_is_complete, write_partition
+
+logger = logging.getLogger(__name__)
+
+
+# First date that still needs exporting, or None to start from the oldest document
+def first_date_to_sync(root, since=None):
+    complete = [date_str for date_str in partition_dates(root) if partition_is_complete(root, date_str)]
+    if complete:
+        last = datetime.strptime(complete[-1], '%Y-%m-%d') + timedelta(days=1)
+        start = last.strftime('%Y-%m-%d')
+        return max(start, since) if since else start
+    return since
+
+
+# Export every day from the start date up to yesterday (or today) into root
+def sync_snapshot(collection, root, since=None, include_today=False, batch_size=5000):
+    today = datetime.today().strftime('%Y-%m-%d')
+    start = first_date_to_sync(root, since)
+
+    date_filter = {'$lte': today} if include_today else {'$lt': today}
+    if start:
+        date_filter['$gte'] = start
+    dates = sorted(collection.distinct('date', {'date': date_filter}))
+
+    for date_str in dates:
+        cursor = collection.find({'date': date_str}, SNAPSHOT_PROJECTION).batch_size(batch_size)
+        rows = write_partition(root, date_str, cursor)
+        logger.info("Wrote %s rows for %s", rows, date_str)
+    return dates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync new days from MongoDB into the Arrow snapshot")
+    parser.add_argument('--path', help='snapshot directory (default: SNAPSHOT_PATH)')
+    parser.add_argument('--since', help='do not export days before this date (YYYY-MM-DD)')
+    parser.add_argument('--include-today', action='store_true', help="also write today's partial day")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    load_dotenv('variables.env')
+    root = args.path or os.getenv('SNAPSHOT_PATH', 'snapshot')
+    database = os.getenv('MONGODB_DATABASE', os.getenv('MONGODB_DB'))
+    collection = create_client(os.getenv('MONGODB_URI'))[database][os.getenv('MONGODB_COLLECTION')]
+
+    dates = sync_snapshot(collection, root, since=args.since, include_today=args.include_today)
+    logger.info("Synced %s day(s) into %s", len(dates), root)
+
+
+if __name__ == '__main__':
+    main()
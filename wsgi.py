@@ -0,0 +1,16 @@
+# WSGI entry point for production servers, e.g.
+#
+#   gunicorn -c gunicorn.conf.py wsgi:server
+#
+# The Mongo client connects on first use and background threads (Home ID refresh,
+# index check) are started per worker, so the app can be preloaded in the master
+# process and forked. Set DATA_CACHE_BACKEND=disk for the workers to share one cache.
+# Point liveness probes at /health and readiness probes at /ready (see health.py).
+
+import os
+
+os.environ.setdefault('DEFER_BACKGROUND_TASKS', '1')
+
+from app import app  # noqa: E402
+
+server = app.server